@@ -0,0 +1,83 @@
+"""Times redrawing the board after filling the nine tiles of a box, drag-selecting every tile one frame at a time,
+and redrawing the rules of a level full of cages, at a high-DPI fullscreen size, for both grid backends.
+
+Run from the repository root: PYTHONPATH=src python -m benchmarks.board
+"""
+import contextlib
+import os
+import timeit
+
+import pygame as pg
+from pygame import Surface, SRCALPHA
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+from pygame.sprite import LayeredDirty
+
+from core.gfx.ui import GUIManager
+from sudoku.board import Board
+from sudoku.grid import Grid, ArrayGrid, InputMode
+from sudoku.rules import SudokuRule, KillerRule
+
+BOARD_SIZE = 2000
+NUMBER = 50
+
+BOX = [(x, y) for y in range(3) for x in range(3)]
+# Drag path over the whole board, row by row
+DRAG = [(x if y % 2 == 0 else 8 - x, y) for y in range(9) for x in range(9)]
+# 27 cages of three tiles, covering the board. With sums, so none is skipped as redundant within its box
+CAGES = [{(x, y), (x + 1, y), (x + 2, y)} for y in range(9) for x in range(0, 9, 3)]
+CAGE_SUMS = range(6, 25)
+
+
+def bench(grid: Grid):
+    board = Board(
+        (0, 0), BOARD_SIZE, BOARD_SIZE / 11, LayeredDirty(), GUIManager((BOARD_SIZE, BOARD_SIZE)),
+        grid=grid, check_dead_ends=True
+    )
+    board.playing = True
+
+    values = iter(range(NUMBER * 5 + 1))
+
+    def fill():
+        board.fill_tiles(next(values) % 9 + 1, BOX, InputMode.INPUT_MODE_VALUE)
+        board.update()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fill()
+        time = min(timeit.repeat(fill, number=NUMBER, repeat=5)) / NUMBER
+    board.dead_ends.cancel()
+
+    def drag():
+        for pos in DRAG:
+            board.selection.select(pos)
+            board.selection.update()
+
+    drag_time = min(timeit.repeat(drag, setup=board.selection.clear, number=1, repeat=5)) / len(DRAG)
+
+    cage_rules = {KillerRule(CAGE_SUMS[i % len(CAGE_SUMS)], cage) for i, cage in enumerate(CAGES)}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        board.rule_manager.add_rule({SudokuRule(), *cage_rules})
+    board.dead_ends.cancel()
+    rules = min(timeit.repeat(board.redraw_rules, number=NUMBER // 5, repeat=5)) / (NUMBER // 5)
+    layer = Surface(board.render_grid_rect.size, SRCALPHA)
+    cages = [rule for rule in board.rule_manager.component_rules if isinstance(rule, KillerRule)]
+    draw_cages = min(timeit.repeat(
+        lambda: [cage.draw(layer, board.render_tile_size) for cage in cages], number=NUMBER, repeat=5
+    )) / NUMBER
+
+    print(f"[Benchmark]: {type(grid).__name__}, {board.grid_rect.w}x{board.grid_rect.h} grid, "
+          f"filling a box and updating the frame takes {time * 1e3:.2f} ms, "
+          f"drag-selecting takes {drag_time * 1e3:.2f} ms per frame, "
+          f"redrawing the rules takes {rules * 1e3:.2f} ms, "
+          f"{draw_cages * 1e3:.2f} ms of which drawing {len(cages)} cages")
+
+
+def main():
+    bench(Grid())
+    bench(ArrayGrid())
+
+
+if __name__ == '__main__':
+    main()
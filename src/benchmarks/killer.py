@@ -0,0 +1,82 @@
+"""Compares killer cage candidate lookups through CAGE_COMBINATIONS against enumerating digit sets.
+
+Run from the repository root: PYTHONPATH=src python -m benchmarks.killer
+"""
+import contextlib
+import os
+import random
+import timeit
+from itertools import combinations
+
+import pygame as pg
+
+pg.init()
+
+from sudoku.rules.killer import KillerRule, CAGE_COMBINATIONS, build_cage_combinations, cage_candidates
+from sudoku.rules.rule import ALL_DIGITS
+
+NUMBER = 2000
+
+
+def enumerate_candidates(size: int, target: int, placed: int) -> int:
+    """The straightforward way: try every set of distinct digits."""
+    candidates = 0
+    for digits in combinations(range(1, 10), size):
+        mask = sum(1 << (d - 1) for d in digits)
+        if sum(digits) == target and mask & placed == placed:
+            candidates |= mask
+    return candidates & ~placed
+
+
+def random_cages(rng: random.Random, count: int) -> list[tuple[int, int, int]]:
+    """(size, target, placed) for cages of every size, with up to size - 1 of their digits placed."""
+    cages = []
+    while len(cages) < count:
+        size = rng.randint(1, 9)
+        digits = rng.sample(range(1, 10), size)
+        placed = sum(1 << (d - 1) for d in digits[:rng.randrange(size)])
+        cages.append((size, sum(digits), placed))
+    return cages
+
+
+def main():
+    rng = random.Random(0)
+    cages = random_cages(rng, 200)
+    for cage in cages:
+        assert cage_candidates(*cage) == enumerate_candidates(*cage)
+
+    build = min(timeit.repeat(build_cage_combinations, number=1, repeat=5))
+    print(f"[Benchmark]: Table build {build * 1e3:.1f} ms, "
+          f"{sum(len(combos) for row in CAGE_COMBINATIONS for combos in row)} combinations")
+
+    cage_candidates.cache_clear()
+    naive = min(timeit.repeat(lambda: [enumerate_candidates(*cage) for cage in cages], number=5, repeat=5)) / (5 * len(cages))
+    cold = min(timeit.repeat(
+        lambda: (cage_candidates.cache_clear(), [cage_candidates(*cage) for cage in cages]), number=5, repeat=5
+    )) / (5 * len(cages))
+    warm = min(timeit.repeat(lambda: [cage_candidates(*cage) for cage in cages], number=50, repeat=5)) / (50 * len(cages))
+    print(f"[Benchmark]: Candidates per cage: enumerated {naive * 1e6:.2f} us, "
+          f"table {cold * 1e6:.2f} us, table cached {warm * 1e6:.3f} us")
+
+    # Placing and clearing digits in a 4 tile cage, reading its candidates after every change
+    rule = KillerRule(20, {(0, 0), (1, 0), (0, 1), (1, 1)})
+    positions = sorted(rule.bound_to)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        def play():
+            for pos, value in zip(positions, (9, 8, 2)):
+                rule.update(pos, value, 0)
+                rule.candidates()
+            for pos, value in zip(positions, (9, 8, 2)):
+                rule.update(pos, 0, value)
+                rule.candidates()
+
+        incremental = min(timeit.repeat(play, number=NUMBER, repeat=5)) / (NUMBER * 6)
+    print(f"[Benchmark]: Incremental update + candidates {incremental * 1e6:.2f} us")
+
+    candidates = [ALL_DIGITS] * 81
+    propagate = min(timeit.repeat(lambda: rule.propagate(candidates[:]), number=NUMBER, repeat=5)) / NUMBER
+    print(f"[Benchmark]: Propagate a 4 tile cage {propagate * 1e6:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Measures RuleManager.update cost against the number of killer cages in a level,
+for tiles outside any cage and for tiles inside one.
+
+Run from the repository root: PYTHONPATH=src python -m benchmarks.rule_manager
+"""
+import contextlib
+import os
+import random
+import timeit
+
+import pygame as pg
+
+pg.init()
+
+from sudoku.rules import SudokuRule, KillerRule
+from sudoku.rules.rule import RuleManager
+
+
+CAGE_COUNTS = (4, 40, 400, 800)
+UPDATES = 2000
+
+# Updates outside cages are applied inside the top left box
+UPDATE_CELLS = [(x, y) for y in range(3) for x in range(3)]
+# Updates inside cages go to the same four cages whatever the cage count, next to the box
+FIXED_CAGES = [({(3, y), (4, y)}, 9 + y) for y in range(2)] + [({(6, y), (7, y)}, 11 + y) for y in range(2)]
+CAGED_CELLS = [pos for cage, _ in FIXED_CAGES for pos in sorted(cage)]
+# The other cages are spread over the rest of the board
+CAGE_CELLS = [(x, y) for y in range(3, 9) for x in range(9)]
+CAGE_PAIRS = [{(x, y), (x + 1, y)} for x, y in CAGE_CELLS if x < 8] + \
+             [{(x, y), (x, y + 1)} for x, y in CAGE_CELLS if y < 8]
+
+
+def synthetic_rules(n_cages: int, rng: random.Random) -> set:
+    # Cages with sums, none with the same tiles and sum, so none of them is skipped as redundant
+    shapes = rng.sample([(pair, target) for pair in CAGE_PAIRS for target in range(3, 18)], n_cages - len(FIXED_CAGES))
+    return {SudokuRule(), *(KillerRule(target, cage) for cage, target in FIXED_CAGES + shapes)}
+
+
+def bench(n_cages: int) -> tuple[float, float]:
+    rng = random.Random(n_cages)
+    manager = RuleManager(synthetic_rules(n_cages, rng))
+    assert not manager.redundant_rules
+
+    # Half fill the board so conflict lookups have same-valued tiles to compare with
+    for pos in rng.sample(CAGE_CELLS, 27):
+        manager.update(rng.randint(1, 9), {pos: 0})
+
+    def timed(cells: list[tuple[int, int]]) -> float:
+        values = {pos: 0 for pos in cells}
+        inputs = [(rng.choice(cells), rng.randint(1, 9)) for _ in range(UPDATES)]
+
+        def run():
+            for pos, val in inputs:
+                manager.update(val, {pos: values[pos]})
+                values[pos] = 0 if val == values[pos] else val
+
+        return min(timeit.repeat(run, number=1, repeat=5)) / UPDATES
+
+    return timed(UPDATE_CELLS), timed(CAGED_CELLS)
+
+
+def main():
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        results = [(n, *bench(n)) for n in CAGE_COUNTS]
+
+    for n, outside, inside in results:
+        print(f"[Benchmark]: {n:4d} cages: {outside * 1e6:7.2f} us/update outside cages, "
+              f"{inside * 1e6:7.2f} us/update inside one")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Times the exact cover solver over every shipped seed.
+
+Run from the repository root: PYTHONPATH=src python -m benchmarks.solver
+"""
+import timeit
+
+import pygame as pg
+
+pg.init()
+
+from sudoku.level import Level, seeds, parse_seed
+from sudoku.rules import SudokuRule
+from sudoku.solver import ExactCoverSolver, solve
+
+REPEAT = 20
+
+
+def main():
+    levels = [Level("Seed", {SudokuRule()}, parse_seed(seed)) for seed in seeds]
+    if not levels:
+        print("[Benchmark]: No seeds found, run from the repository root.")
+        return
+
+    solver = ExactCoverSolver.from_ruleset({SudokuRule()})
+    for level in levels:
+        solution = solve(level)
+        assert solution and all(solution[pos] == value for pos, value in level.start_values.items())
+
+    times = sorted(
+        min(timeit.repeat(lambda: solver.solve(level.start_values), number=1, repeat=REPEAT))
+        for level in levels
+    )
+    print(f"[Benchmark]: {len(levels)} seeds, "
+          f"mean {sum(times) / len(times) * 1e3:.3f} ms, "
+          f"median {times[len(times) // 2] * 1e3:.3f} ms, "
+          f"max {times[-1] * 1e3:.3f} ms per puzzle")
+
+
+if __name__ == '__main__':
+    main()
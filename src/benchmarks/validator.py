@@ -0,0 +1,62 @@
+"""Times batch validation of classic grids, checked against the rule manager on a sample.
+
+Run from the repository root: PYTHONPATH=src python -m benchmarks.validator
+"""
+import random
+import timeit
+
+import numpy as np
+import pygame as pg
+
+pg.init()
+
+from sudoku.level import Level, seeds, parse_seed
+from sudoku.rules import SudokuRule, CompiledRuleset
+from sudoku.rules.rule import RuleManager, POSITIONS
+from sudoku.solver import solve
+
+GRIDS = 100_000
+SAMPLE = 500
+REPEAT = 3
+
+
+def make_grids(solutions: list[np.ndarray]) -> np.ndarray:
+    """Solutions with some tiles cleared, and about half of them with a tile changed."""
+    rng = np.random.default_rng(0)
+    grids = np.stack(solutions)[rng.integers(len(solutions), size=GRIDS)].reshape(GRIDS, 81)
+    grids[rng.random(grids.shape) < 0.2] = 0
+    broken = np.flatnonzero(rng.random(GRIDS) < 0.5)
+    grids[broken, rng.integers(81, size=len(broken))] = rng.integers(1, 10, size=len(broken))
+    return grids.reshape(GRIDS, 9, 9)
+
+
+def main():
+    levels = [Level("Seed", {SudokuRule()}, parse_seed(seed)) for seed in seeds]
+    if not levels:
+        print("[Benchmark]: No seeds found, run from the repository root.")
+        return
+
+    solutions = []
+    for level in levels:
+        solution = solve(level)
+        solutions.append(np.array([solution[pos] for pos in POSITIONS], dtype=np.uint8).reshape(9, 9))
+    grids = make_grids(solutions)
+
+    compiled = CompiledRuleset({SudokuRule()})
+    valid, conflicts = compiled.validate(grids)
+
+    rule_manager = RuleManager()
+    rule_manager.add_rule(SudokuRule())
+    for n in random.Random(0).sample(range(GRIDS), SAMPLE):
+        rule_manager.load_values({pos: int(grids[n].flat[i]) for i, pos in enumerate(POSITIONS) if grids[n].flat[i]})
+        expected = rule_manager.conflicting_tiles()
+        assert {POSITIONS[i] for i in np.flatnonzero(conflicts[n])} == expected
+        assert valid[n] == (not expected)
+
+    time = min(timeit.repeat(lambda: compiled.validate(grids), number=1, repeat=REPEAT))
+    print(f"[Benchmark]: {GRIDS} grids ({np.count_nonzero(~valid)} invalid) in {time * 1e3:.1f} ms, "
+          f"{GRIDS / time:,.0f} grids/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,17 @@
-from abc import abstractmethod, ABC
+import numpy as np
 
+# Weights of the corners of a state: top left, top right, bottom right, bottom left
+_CORNER_WEIGHTS = np.array((1, 2, 4, 8), dtype=np.uint8)
 
-class MeshGrid(ABC):
-    """Holds and calculates the data needed to build a mesh base using Marching Square."""
+
+class MeshGrid:
+    """Holds and calculates the data needed to build a mesh base using Marching Square.
+    State (sx, sy) packs whether its corner bits are set: top left, top right, bottom right, bottom left as bits 0 - 3.
+    Bits and states are stored flat, so updating the states around any set of bits takes a few array operations."""
+
+    # Per grid size: the 4 corner bits of every state, and the (up to) 4 states around every bit.
+    # Missing states point to an extra last state, which is written but never read
+    __tables: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
 
     def __init__(self, size: tuple[int, int]):
         """state_size: The size of the state grid
@@ -11,37 +20,55 @@ class MeshGrid(ABC):
         self.state_size = self.state_w, self.state_h = size
         self.bit_size = self.bit_w, self.bit_h = self.state_w + 1, self.state_h + 1
 
-        self._states = [[0 for _ in range(self.state_w)] for _ in range(self.state_h)]
-        self.bits = [[0 for _ in range(self.bit_w)] for _ in range(self.bit_h)]
+        self.state_corners, self.bit_states = MeshGrid.__get_tables(size)
+        self._states = np.zeros(self.state_w * self.state_h + 1, dtype=np.uint8)
+        self._bits = np.zeros(self.bit_w * self.bit_h, dtype=np.int32)
+
+        # (h, w) views, indexed [y, x]
+        self.states = self._states[:-1].reshape(self.state_h, self.state_w)
+        self.bits = self._bits.reshape(self.bit_h, self.bit_w)
+
+    @staticmethod
+    def __get_tables(size: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+        tables = MeshGrid.__tables.get(size)
+        if tables is None:
+            state_w, state_h = size
+            bit_w = state_w + 1
+            state_count = state_w * state_h
+
+            sy, sx = np.divmod(np.arange(state_count), state_w)
+            top_left = sy * bit_w + sx
+            state_corners = np.zeros((state_count + 1, 4), dtype=np.intp)
+            state_corners[:-1] = np.stack((top_left, top_left + 1, top_left + bit_w + 1, top_left + bit_w), axis=1)
 
-    @property
-    def states(self):
-        return self._states
+            bit_states = np.full(((state_h + 1) * bit_w, 4), state_count, dtype=np.intp)
+            for corner in range(4):
+                bit_states[state_corners[:-1, corner], corner] = np.arange(state_count)
+            tables = MeshGrid.__tables[size] = state_corners, bit_states
+        return tables
 
     def reset(self):
-        self._states = [[0 for _ in range(self.state_w)] for _ in range(self.state_h)]
-        self.bits = [[0 for _ in range(self.bit_w)] for _ in range(self.bit_h)]
+        self._states.fill(0)
+        self._bits.fill(0)
 
     def add(self, value: int, bit_pos: set[tuple[int, int]]) -> set[tuple[int, int]]:
-        """Adds value to specified positions"""
-        # Update bits and record affected states
-        affected = set()
-        for bx, by in bit_pos:
-            self.bits[by][bx] += value
-            affected |= self.bit_to_state(bx, by)
-
-        # Update affected states
-        for sx, sy in affected:
-            self.update_state(sx, sy)
-
-        return affected
-
-    @abstractmethod
-    def bit_to_state(self, bx, by) -> set[tuple[int, int]]:
-        """Describes how bit position map to state position"""
-        return set()
-
-    @abstractmethod
-    def update_state(self, sx, sy):
-        """Recalculates the specified state position"""
-        pass
+        """Adds value to specified positions. Returns the positions of the states around them."""
+        if not bit_pos:
+            return set()
+
+        bit_w = self.bit_w
+        bits = np.fromiter((by * bit_w + bx for bx, by in bit_pos), dtype=np.intp, count=len(bit_pos))
+        self._bits[bits] += value
+
+        # States around several of the bits are recalculated more than once, to the same value
+        states = self.bit_states[bits].ravel()
+        self.update_states(states)
+
+        affected = set(states.tolist())
+        affected.discard(len(self._states) - 1)
+        state_w = self.state_w
+        return {(s % state_w, s // state_w) for s in affected}
+
+    def update_states(self, states: np.ndarray):
+        """Recalculates the states at the given flat indices, sy * state_w + sx"""
+        self._states[states] = (self._bits[self.state_corners[states]] > 0) @ _CORNER_WEIGHTS
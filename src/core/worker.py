@@ -0,0 +1,64 @@
+import threading
+import traceback
+from typing import Any, Callable
+
+import pygame as pg
+
+
+class BackgroundWorker:
+    """
+    Runs one job at a time on a daemon thread and posts each result to the pygame event queue
+    as pg.event.Event(event_type, result=..., **data).
+    Submitting while a job is waiting replaces it, and the running job is asked to stop,
+    so only the latest request ever gets an answer.
+    """
+
+    def __init__(self, event_type: int, name: str = "Worker", delay: float = 0):
+        """delay: Seconds a job waits before starting, so a burst of requests only runs the last one"""
+        self.event_type = event_type
+        self.name = name
+        self.delay = delay
+
+        self.__condition = threading.Condition()
+        self.__pending = None
+        self.__cancel = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name=name, daemon=True)
+        self.__thread.start()
+
+    def submit(self, job: Callable[[threading.Event], Any], **data):
+        """job: Called with a cancel event it should check now and then
+        data: Posted along with the result, e.g. to tell which request it answers"""
+        with self.__condition:
+            self.__cancel.set()
+            self.__pending = (job, data)
+            self.__condition.notify()
+
+    def cancel(self):
+        with self.__condition:
+            self.__cancel.set()
+            self.__pending = None
+            self.__condition.notify()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while True:
+                    while self.__pending is None:
+                        self.__condition.wait()
+                    pending = self.__pending
+                    # Replaced or cancelled before the delay is up, so wait for what comes next
+                    if not self.delay or not self.__condition.wait_for(lambda: self.__pending is not pending, self.delay):
+                        break
+                job, data = self.__pending
+                self.__pending = None
+                cancel = self.__cancel = threading.Event()
+
+            try:
+                result = job(cancel)
+            except Exception:
+                print(f"[{self.name}]: Job failed.")
+                traceback.print_exc()
+                continue
+
+            if not cancel.is_set():
+                pg.event.post(pg.event.Event(self.event_type, result=result, **data))
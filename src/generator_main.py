@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import pickle
+from multiprocessing import cpu_count
+from time import perf_counter
+
+import pygame as pg
+
+# Rules create their fonts on import. A full pg.init() would also install SDL's signal handlers,
+# which forked pool workers inherit and which keep them from terminating
+pg.font.init()
+
+from sudoku.level import Level, format_seed
+from sudoku.rules import SudokuRule
+from sudoku.solver import Symmetry, generate
+
+SEEDS_PATH = "data/levels/seeds.json"
+FLUSH_EVERY = 100
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generates uniquely solvable classic sudoku puzzles.")
+    parser.add_argument("count", type=int, help="number of puzzles to generate")
+    parser.add_argument("-c", "--clues", type=int, default=0, help="target clue count, 0 for as few as possible")
+    parser.add_argument(
+        "-s", "--symmetry", choices=[_.value for _ in Symmetry], default=Symmetry.ROTATIONAL.value
+    )
+    parser.add_argument("-p", "--processes", type=int, default=cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, for reproducible batches")
+
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--seeds", metavar="PATH", nargs='?', const=SEEDS_PATH, help="append to a seed file")
+    output.add_argument("--pack", metavar="DIR", help="write every puzzle as a level into a directory")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    seeds = []
+    if args.seeds and os.path.exists(args.seeds):
+        with open(args.seeds, "r") as file:
+            seeds = json.load(file)
+    if args.pack:
+        os.makedirs(args.pack, exist_ok=True)
+
+    def flush_seeds():
+        with open(args.seeds, "w") as file:
+            json.dump(seeds, file, indent='\t')
+
+    start = perf_counter()
+    generated = 0
+    for values in generate(args.count, args.clues, Symmetry(args.symmetry), args.processes, args.seed):
+        generated += 1
+        seed = format_seed(values)
+
+        if args.seeds:
+            seeds.append(seed)
+            if generated % FLUSH_EVERY == 0:
+                flush_seeds()
+        elif args.pack:
+            level = Level(f"Generated #{generated}", {SudokuRule()}, values)
+            with open(f"{args.pack}/generated_{generated:05d}.dat", 'wb') as f:
+                pickle.dump(level, f)
+        else:
+            print(seed)
+
+    if args.seeds:
+        flush_seeds()
+
+    elapsed = perf_counter() - start
+    rate = generated / elapsed if elapsed else 0
+    print(
+        f"[Generator]: {generated} puzzle(s) in {elapsed:.2f}s, "
+        f"{rate:.2f} puzzles/s, {rate / args.processes:.2f} puzzles/s/core ({args.processes} process(es))."
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,13 @@
+import copy
 import os
 
 from core.app import Application
-from sudoku.grid import InputMode
+from core.worker import BackgroundWorker
 from sudoku.level import Level, LevelList
 from .ui.rule_list import RuleListPanel
 from .ui.properties import PropertiesPanel
 from sudoku.board import Board
+from sudoku.solver import count_solutions, SolveStatus
 from core.ui import ButtonGrid
 
 import pygame as pg
@@ -19,10 +21,16 @@ import tkinter.filedialog
 
 
 class LevelMaker(Application):
+    UNIQUENESS_TIME_BUDGET = 1
+    UNIQUENESS_CHECKED = pg.event.custom_type()
 
     def __init__(self):
         super().__init__("Sudoku Level Maker", (1280, 720))
 
+        # Counted in the background, every edit cancels the running count and starts another
+        self.uniqueness = BackgroundWorker(LevelMaker.UNIQUENESS_CHECKED, "Uniqueness Check")
+        self.uniqueness_request = 0
+
         self.opened_level_path = ""
         self.levels_path = f"{os.getcwd()}/{LevelList.LEVELS_PATH}"
         if not os.path.exists(self.levels_path):
@@ -39,6 +47,7 @@ class LevelMaker(Application):
 
         self.right_panel = None
         self.name = None
+        self.uniqueness_label = None
         self.properties_panel = None
 
         self.board = None
@@ -90,9 +99,14 @@ class LevelMaker(Application):
             self.right_panel.relative_rect.w - 2 * pad, 30
         ), self.ui_manager, self.right_panel)
 
+        self.uniqueness_label = UILabel(
+            Rect(0, self.name.relative_rect.bottom + pad, self.right_panel.relative_rect.w, 20),
+            "", self.ui_manager, self.right_panel
+        )
+
         self.label_2 = UILabel(
             Rect(
-                0, self.name.relative_rect.bottom + pad,
+                0, self.uniqueness_label.relative_rect.bottom + pad,
                 self.right_panel.relative_rect.w, 20
             ),
             "Rule properties", self.ui_manager, self.right_panel
@@ -130,7 +144,10 @@ class LevelMaker(Application):
         self.name.set_relative_position((pad, self.label_1.relative_rect.bottom + pad))
         self.name.set_dimensions((self.right_panel.relative_rect.w - 2 * pad, 30))
 
-        self.label_2.set_relative_position((0, self.name.relative_rect.bottom + pad))
+        self.uniqueness_label.set_relative_position((0, self.name.relative_rect.bottom + pad))
+        self.uniqueness_label.set_dimensions((self.right_panel.relative_rect.w, 20))
+
+        self.label_2.set_relative_position((0, self.uniqueness_label.relative_rect.bottom + pad))
         self.label_2.set_dimensions((self.right_panel.relative_rect.w, 20))
 
         self.properties_panel.set_relative_rect(Rect(
@@ -144,9 +161,15 @@ class LevelMaker(Application):
         self.rule_list.on_rule_removed.add_handler(self.board.rule_manager.remove_rule)
 
         self.properties_panel.on_applied.add_handler(self.board.redraw_rules)
+        self.properties_panel.on_applied.add_handler(self.board.rule_manager.refresh)
         self.board.rule_manager.on_rule_added.add_handler(self.board.redraw_rules)
         self.board.rule_manager.on_rule_removed.add_handler(self.board.redraw_rules)
 
+        self.rule_list.on_rule_added.add_handler(self.check_uniqueness)
+        self.rule_list.on_rule_removed.add_handler(self.check_uniqueness)
+        self.properties_panel.on_applied.add_handler(self.check_uniqueness)
+        self.board.grid.on_changed.add_handler(self.__on_values_changed)
+
     def load_level(self, level: Level):
         self.name.set_text(level.name)
 
@@ -156,11 +179,37 @@ class LevelMaker(Application):
         self.properties_panel.set_rule(None)
         self.rule_list.set_rule_list(level.ruleset)
 
-        self.board.grid.clear()
-        for pos, val in level.start_values.items():
-            self.board.fill_tiles(val, [pos], InputMode.INPUT_MODE_VALUE, no_record=True)
+        self.board.load_values(level.start_values)
 
         self.board.redraw_rules()
+        self.check_uniqueness()
+
+    def check_uniqueness(self):
+        # Copied, the rules keep being edited while they are counted
+        level = Level(
+            ruleset=copy.deepcopy(self.board.rule_manager.rules), start_values=self.board.grid.get_numbered_tiles()
+        )
+        self.uniqueness_request += 1
+        self.uniqueness.submit(
+            lambda cancel: count_solutions(level, time_budget=LevelMaker.UNIQUENESS_TIME_BUDGET, cancel=cancel),
+            request=self.uniqueness_request
+        )
+        self.uniqueness_label.set_text("Counting solutions...")
+
+    def show_uniqueness(self, result):
+        print(f"[Level Maker]: {result}")
+
+        match result.status:
+            case SolveStatus.NO_SOLUTION:
+                text = "No solution"
+            case SolveStatus.TIMEOUT:
+                text = "Solution count unknown (timed out)"
+            case _:
+                text = "Unique solution" if result.is_unique else f"Multiple solutions ({len(result.differing)} tiles differ)"
+        self.uniqueness_label.set_text(text)
+
+    def __on_values_changed(self, new_values, old_values):
+        self.check_uniqueness()
 
     def new_level(self):
         self.opened_level_path = ""
@@ -214,9 +263,16 @@ class LevelMaker(Application):
                     self.open()
                 elif evt.ui_element == self.menu.get_button("new"):
                     self.new_level()
+            case LevelMaker.UNIQUENESS_CHECKED:
+                # Answers for rules or values that have changed since are dropped, a newer count is on its way
+                if evt.request == self.uniqueness_request:
+                    self.show_uniqueness(evt.result)
 
         self.board.process_events(evt)
 
+    def cleanup(self):
+        self.uniqueness.cancel()
+
     def _update(self, dt):
         self.board.update()
         self.sprites.update()
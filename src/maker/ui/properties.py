@@ -127,4 +127,4 @@ class PropertiesPanel(UIPanel):
                         self.message_board.set_text(str(e))
                     else:
                         self.message_board.set_text("Updated rule successfully!")
-                        self.on_applied()
+                        self.on_applied(rule=self.current_rule)
@@ -0,0 +1,38 @@
+import argparse
+from multiprocessing import cpu_count
+from time import perf_counter
+
+import pygame as pg
+
+# Rules create their fonts on import. A full pg.init() would also install SDL's signal handlers,
+# which forked pool workers inherit and which keep them from terminating
+pg.font.init()
+
+from sudoku.level import LevelList
+from sudoku.solver import rate_directory
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rates the difficulty of every level in a directory.")
+    parser.add_argument("path", nargs='?', default=LevelList.LEVELS_PATH, help="directory of .dat levels")
+    parser.add_argument("-p", "--processes", type=int, default=cpu_count(), help="worker processes")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    start = perf_counter()
+    ratings = rate_directory(args.path, args.processes)
+    elapsed = perf_counter() - start
+
+    for path, rating in ratings:
+        print(f"{rating.difficulty:<8} {rating.score:>6}  {path}")
+    print(
+        f"[Rater]: {len(ratings)} level(s) in {elapsed:.2f}s, "
+        f"{len(ratings) / elapsed if elapsed else 0:.1f} levels/s ({args.processes} process(es))."
+    )
+
+
+if __name__ == '__main__':
+    main()
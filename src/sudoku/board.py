@@ -8,8 +8,11 @@ from pygame_gui.core import IContainerLikeInterface
 from pygame_gui.core.interfaces import IUIManagerInterface
 
 from .grid import Grid, InputMode
+from .candidates import AutoCandidates
+from .dead_end import DeadEndService
+from .glyphs import GlyphAtlas, GlyphStyle
 from .selection import SelectionGrid
-from .rules.rule import RuleManager
+from .rules.rule import RuleManager, POSITIONS, pos_to_index
 from .rules.killer import KillerRule
 from .rules.surround import SurroundRule
 from .rules.dots import DotRule
@@ -54,7 +57,9 @@ class Board:
             manager: IUIManagerInterface,
             container: IContainerLikeInterface = None,
             title_height=20,
-            show_timer=True
+            show_timer=True,
+            grid: Grid = None,
+            check_dead_ends=False
     ):
         # Properties
         self.container = container
@@ -79,7 +84,7 @@ class Board:
         self.render_grid_rect = Rect(0, 0, self.render_tlw * 9, self.render_tlh * 9)
 
         # Components
-        self.grid = Grid()
+        self.grid = grid or Grid()
         self.selection = SelectionGrid(Rect(
             self.grid_relative_rect.left - self.tlw / 2,
             self.grid_relative_rect.top - self.tlh / 2,
@@ -111,12 +116,21 @@ class Board:
         self.multi_select = False
         self.should_select = False
         self.enable_highlight = True
+        self.check_progress = False
+        self.solution: list[int] | None = None
+        self.mistakes: set[tuple[int, int]] = set()
+        self.__highlighted: set[tuple[int, int]] = set()
+        self.solvable: bool | None = True
+        # Only boards played on check for dead ends
+        self.dead_ends = DeadEndService() if check_dead_ends else None
         self.locked = False
         self.playing = False
 
         # Layers
         self.__origin_layers = [Surface(self.render_grid_rect.size, SRCALPHA) for _ in range(5)]
         self.layers = [DirtySprite() for _ in range(6)]
+        # Tiles redrawn since the last frame, rescaled into the displayed layers once per frame
+        self.__dirty_tiles: set[tuple[int, int]] = set()
 
         self.layers[Board.LAYER_COLOR].image = Surface(self.grid_rect.size, SRCALPHA)
         self.layers[Board.LAYER_COLOR].rect = Rect(self.grid_rect)
@@ -143,10 +157,21 @@ class Board:
 
         # Event handlers
         self.on_won = Event()
+        self.on_solvable_changed = Event()
 
-        self.grid.on_changed.add_handler(self.rule_manager.update)
+        self.grid.on_changed.add_handler(self.rule_manager.update_many)
         self.grid.on_changed.add_handler(self.draw_tiles)
-        self.rule_manager.on_conflict_changed.add_handler(self.grid.highlight_conflicts)
+        self.grid.on_changed.add_handler(self.__update_mistakes)
+        self.grid.on_loaded.add_handler(self.rule_manager.load_values)
+        self.grid.on_loaded.add_handler(self.__load_mistakes)
+        self.rule_manager.on_conflict_changed.add_handler(self.__update_highlights)
+        if self.dead_ends:
+            self.grid.on_changed.add_handler(self.__on_values_changed)
+            self.grid.on_loaded.add_handler(self.__check_dead_end)
+            self.rule_manager.on_rule_added.add_handler(self.__on_rules_changed)
+            self.rule_manager.on_rule_removed.add_handler(self.__on_rules_changed)
+            self.rule_manager.on_rule_refreshed.add_handler(self.__on_rules_changed)
+        self.auto_candidates = AutoCandidates(self.grid, self.rule_manager)
 
         self.selection.generate_mesh_sprites(.25, (255, 0, 255, 100), 1, (255, 0, 255))
         KillerRule.generate_killer_mesh(self.tile_size)
@@ -213,6 +238,7 @@ class Board:
             self.layers[_].dirty = 1
             self.layers[_].rect = self.grid_rect
             self.layers[_].image = smoothscale(self.__origin_layers[_], self.grid_rect.size)
+        self.__dirty_tiles.clear()
 
     def set_highscore(self, time: Time):
         self.best_time.set_text("BEST TIME: " + str(time))
@@ -250,6 +276,11 @@ class Board:
                         self.fill_selection(evt.key - pg.K_1 + 1)
                     case pg.K_KP1 | pg.K_KP2 | pg.K_KP3 | pg.K_KP4 | pg.K_KP5 | pg.K_KP6 | pg.K_KP7 | pg.K_KP8 | pg.K_KP9:
                         self.fill_selection(evt.key - pg.K_KP1 + 1)
+            case DeadEndService.DEAD_END_CHECKED:
+                # Answers for a grid that has changed since are dropped, a newer check is on its way
+                if evt.values == self.grid.get_numbered_tiles() and evt.result != self.solvable:
+                    self.solvable = evt.result
+                    self.on_solvable_changed(solvable=self.solvable)
 
         self.timer.process_events(evt)
 
@@ -261,6 +292,8 @@ class Board:
             else:
                 self.selection.unselect(self.get_tile_pos((mpos[0] - self.grid_rect.left, mpos[1] - self.grid_rect.top)))
 
+        self.__scale_dirty_tiles()
+
     def fill_selection(self, value):
         self.fill_tiles(value, self.selection.selected)
 
@@ -284,48 +317,109 @@ class Board:
         self.grid.fill_tiles(value, mode, positions, **kwargs)
         self.check_win_conditions()
 
+    def load_values(self, values: dict[tuple[int, int], int], lock=False):
+        """Replaces the grid with the given values, rebuilding rule state and redrawing once."""
+        self.grid.load(values, lock)
+
     def set_enable_highlight(self, b: bool):
         self.enable_highlight = b
-        self.draw_tiles(set(self.rule_manager.conflicts.keys()))
+        self.draw_tiles(self.__highlighted)
+
+    def set_check_progress(self, b: bool):
+        """Also highlights tiles that don't match the solution, once it is known."""
+        self.check_progress = b
+        self.__update_highlights()
+
+    def set_solution(self, solution: dict[tuple[int, int], int] | None):
+        self.solution = [solution[pos] for pos in POSITIONS] if solution else None
+        self.__load_mistakes()
+
+    def is_mistake(self, pos: tuple[int, int]) -> bool:
+        value = self.grid.tiles[pos[1]][pos[0]].value
+        return bool(self.solution and value and value != self.solution[pos_to_index(pos)])
+
+    def __load_mistakes(self):
+        self.mistakes = {(x, y) for y in range(9) for x in range(9) if self.is_mistake((x, y))}
+        self.__update_highlights()
+
+    def __update_mistakes(self, new_values: dict[tuple[int, int], int]):
+        if not self.solution:
+            return
+        for pos in new_values:
+            if self.is_mistake(pos):
+                self.mistakes.add(pos)
+            else:
+                self.mistakes.discard(pos)
+        self.__update_highlights()
+
+    def __on_values_changed(self, new_values: dict[tuple[int, int], int]):
+        self.__check_dead_end()
+
+    def __on_rules_changed(self):
+        self.dead_ends.set_rules(self.rule_manager.active_rules)
+        self.__check_dead_end()
+
+    def __check_dead_end(self):
+        self.dead_ends.request(self.grid.get_numbered_tiles())
+
+    def __update_highlights(self):
+        highlighted = self.rule_manager.conflicting_tiles()
+        if self.check_progress:
+            highlighted |= self.mistakes
+        if highlighted != self.__highlighted:
+            self.grid.highlight_conflicts(highlighted, self.__highlighted)
+            self.__highlighted = highlighted
+
+    def set_enable_auto_candidates(self, b: bool):
+        self.auto_candidates.set_enabled(b)
 
     def draw_tiles(self, positions: list | set):
         for x, y in positions:
-            self.draw_tile(x, y)
+            self.__draw_tile(x, y)
+        self.__dirty_tiles.update(positions)
 
     def draw_tile(self, tlx, tly):
+        self.__draw_tile(tlx, tly)
+        self.__dirty_tiles.add((tlx, tly))
+
+    def __scale_dirty_tiles(self):
+        """Rescales only the tiles redrawn since the last frame, straight into the displayed layers."""
+        if not self.__dirty_tiles:
+            return
+
+        for tlx, tly in self.__dirty_tiles:
+            origin_rect = Rect(tlx * self.render_tlw, tly * self.render_tlh, self.render_tlw, self.render_tlh)
+            rect = self.get_tile_rect(tlx, tly)
+            for _ in (Board.LAYER_COLOR, Board.LAYER_NUMBER):
+                smoothscale(
+                    self.__origin_layers[_].subsurface(origin_rect), rect.size, self.layers[_].image.subsurface(rect)
+                )
+        self.__dirty_tiles.clear()
+
+        self.layers[Board.LAYER_COLOR].dirty = 1
+        self.layers[Board.LAYER_NUMBER].dirty = 1
+
+    def __draw_tile(self, tlx, tly):
         tile = self.grid.tiles[tly][tlx]
         pxpos = tlx * self.render_tlw, tly * self.render_tlh
+        # Filling replaces the pixels of exactly this tile, where a polygon would blend into its neighbours' edges
+        tile_rect = Rect(pxpos, self.render_tile_size)
 
-        layer = self.__origin_layers[Board.LAYER_COLOR]
-        Graphics.rect(layer, pxpos, self.render_tile_size, Board.TILE_COLORS[tile.color])
-        self.layers[Board.LAYER_COLOR].dirty = 1
-        self.layers[Board.LAYER_COLOR].image = smoothscale(layer, self.grid_rect.size)
+        self.__origin_layers[Board.LAYER_COLOR].fill(Board.TILE_COLORS[tile.color], tile_rect)
 
         layer = self.__origin_layers[Board.LAYER_NUMBER]
-        Graphics.rect(layer, pxpos, self.render_tile_size, Board.TILE_COLORS[0])
+        layer.fill(Board.TILE_COLORS[0], tile_rect)
 
+        glyphs = GlyphAtlas.get(self.render_tile_size, Board.FONT_VALUE, Board.FONT_MARK)
         if 0 < tile.value < 10:
-            text = Board.FONT_VALUE.render(
-                str(tile.value), True,
-                (255, 0, 0) if self.enable_highlight and tile.highlight else
-                ((140, 160, 160) if tile.locked else (255, 255, 255))
+            glyphs.draw_value(
+                layer, tile.value,
+                GlyphStyle.CONFLICT if self.enable_highlight and tile.highlight else
+                (GlyphStyle.LOCKED if tile.locked else GlyphStyle.NORMAL),
+                pxpos
             )
-            text = smoothscale(text, (text.get_width() * self.render_tlw / 64, text.get_height() * self.render_tlh / 64))
-            layer.blit(text, (
-                pxpos[0] + self.render_tlw / 2 - text.get_width() / 2,
-                pxpos[1] + self.render_tlh / 2 - text.get_height() / 2
-            ))
         elif tile.mark:
-            textstr = ''.join(str(i + 1) for i in range(9) if 1 << i & tile.mark)
-            text = Board.FONT_MARK.render(textstr, True, (255, 255, 255))
-            text = smoothscale(text, (text.get_width() * self.render_tlw / 64, text.get_height() * self.render_tlh / 64))
-            layer.blit(text, (
-                pxpos[0] + self.render_tlw / 2 - text.get_width() / 2,
-                pxpos[1] + self.render_tlh / 2 - text.get_height() / 2
-            ))
-
-        self.layers[Board.LAYER_NUMBER].dirty = 1
-        self.layers[Board.LAYER_NUMBER].image = smoothscale(layer, self.grid_rect.size)
+            glyphs.draw_mark(layer, tile.mark, pxpos)
 
     def set_title(self, title: str):
         self.title_text = title if len(title) else " "
@@ -334,6 +428,11 @@ class Board:
     def get_tile_pos(self, pxpos: tuple[float, float]) -> tuple[int, int]:
         return int(pxpos[0] / self.tlw), int(pxpos[1] / self.tlh)
 
+    def get_tile_rect(self, tlx, tly) -> Rect:
+        """Pixels of a tile in the displayed layers, rounded so that neighbouring tiles share their edges."""
+        left, top = round(tlx * self.tlw), round(tly * self.tlh)
+        return Rect(left, top, round((tlx + 1) * self.tlw) - left, round((tly + 1) * self.tlh) - top)
+
     def redraw_rules(self):
         self.__origin_layers[Board.LAYER_TOP_RULE].fill((0, 0, 0, 0))
         self.__origin_layers[Board.LAYER_BOTTOM_RULE].fill((0, 0, 0, 0))
@@ -0,0 +1,88 @@
+from .grid import Grid
+from .rules.rule import RuleManager, ComponentRule, ALL_DIGITS, POSITIONS, pos_to_index, mask_to_positions
+
+
+class AutoCandidates:
+    """
+    Keeps the marks of empty tiles in sync with the digits their peers allow.
+    A value change only revisits the changed tiles and their peers, reading placed digits from
+    RuleManager.value_to_mask, so each keystroke costs O(peers) however many rules there are.
+    Candidates the player crossed out by hand stay crossed out until they become possible again.
+    """
+
+    def __init__(self, grid: Grid, rule_manager: RuleManager):
+        self.grid = grid
+        self.rule_manager = rule_manager
+        self.enabled = False
+
+        self.peer_masks: list[int] = [0] * 81
+        self.candidates: list[int] = [ALL_DIGITS] * 81
+
+        # Registered after the rule manager's handlers, so value_to_mask is already up-to-date
+        self.grid.on_changed.add_handler(self.update_many)
+        self.grid.on_loaded.add_handler(self.load_values)
+        self.rule_manager.on_rule_added.add_handler(self.__compile_peers)
+        self.rule_manager.on_rule_removed.add_handler(self.__compile_peers)
+        self.rule_manager.on_rule_refreshed.add_handler(self.__compile_peers)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        if enabled:
+            self.__compile_peers()
+            self.refresh()
+
+    def __compile_peers(self):
+        """Global peers, plus tiles that can't repeat a digit because of a component rule (e.g. killer cages)."""
+        self.peer_masks = list(self.rule_manager.peer_masks)
+        for rule in self.rule_manager.component_rules & self.rule_manager.active_rules:
+            for p1 in rule.bound_to:
+                for p2 in rule.bound_to:
+                    if p1 != p2 and rule.conflict(p1, p2):
+                        self.peer_masks[pos_to_index(p1)] |= 1 << pos_to_index(p2)
+
+        if self.enabled:
+            self.refresh()
+
+    def __compute(self, index: int) -> int:
+        peers = self.peer_masks[index]
+        seen = 0
+        for value, mask in self.rule_manager.value_to_mask.items():
+            if mask & peers:
+                seen |= 1 << (value - 1)
+        return ALL_DIGITS & ~seen
+
+    def refresh(self):
+        """Recomputes every tile and overwrites the marks of the empty ones."""
+        with self.grid.batch():
+            for index, pos in enumerate(POSITIONS):
+                self.candidates[index] = self.__compute(index)
+                if not self.grid.tiles[pos[1]][pos[0]].value:
+                    self.grid.set_mark(pos, self.candidates[index])
+
+    def load_values(self, values: dict[tuple[int, int], int]):
+        if self.enabled:
+            self.refresh()
+
+    def update_many(self, new_values: dict[tuple[int, int], int], old_values: dict[tuple[int, int], int]):
+        if not self.enabled:
+            return
+
+        affected = 0
+        for pos in new_values:
+            index = pos_to_index(pos)
+            affected |= self.peer_masks[index] | 1 << index
+
+        with self.grid.batch():
+            for pos in mask_to_positions(affected):
+                index = pos_to_index(pos)
+                old_candidates, candidates = self.candidates[index], self.__compute(index)
+                self.candidates[index] = candidates
+
+                tile = self.grid.tiles[pos[1]][pos[0]]
+                if tile.value:
+                    continue
+                if pos in new_values:
+                    # Marks weren't kept up while the tile held a value
+                    self.grid.set_mark(pos, candidates)
+                elif candidates != old_candidates:
+                    self.grid.set_mark(pos, tile.mark & candidates | candidates & ~old_candidates)
@@ -0,0 +1,47 @@
+import copy
+from threading import Event
+
+import pygame as pg
+
+from core.worker import BackgroundWorker
+from .rules.rule import Rule
+from .solver import PropagationSolver, SolveStatus
+
+DEAD_END_TIME_BUDGET = 2
+# Seconds without new entries before a check starts, so fast typing doesn't keep a solver thread busy
+DEAD_END_DELAY = .25
+
+
+def is_solvable(ruleset: set[Rule], values: dict[tuple[int, int], int], cancel: Event = None) -> bool | None:
+    """Whether the entered values can still be completed. None when the search ran out of time or was cancelled.
+    Most dead ends are caught by propagating the entries, before the search makes a single guess."""
+    result = PropagationSolver(ruleset).solve(values, 1, DEAD_END_TIME_BUDGET, cancel)
+    match result.status:
+        case SolveStatus.SOLVED:
+            return True
+        case SolveStatus.NO_SOLUTION:
+            return False
+    return None
+
+
+class DeadEndService:
+    """Checks grids on a background thread. Answers arrive as DEAD_END_CHECKED events with `result` and `values`.
+    Requests made while a check is waiting or running replace it, so fast typing only gets the newest state checked.
+    Grids are checked against a copy of the rules, taken by set_rules whenever rules are added, removed or edited."""
+
+    DEAD_END_CHECKED = pg.event.custom_type()
+
+    def __init__(self):
+        self.worker = BackgroundWorker(DeadEndService.DEAD_END_CHECKED, "Dead End Service", DEAD_END_DELAY)
+        self.ruleset: set[Rule] = set()
+
+    def set_rules(self, ruleset: set[Rule]):
+        # Copied, the rules keep being updated and edited while they are checked
+        self.ruleset = copy.deepcopy(ruleset)
+
+    def request(self, values: dict[tuple[int, int], int]):
+        ruleset = self.ruleset
+        self.worker.submit(lambda cancel: is_solvable(ruleset, values, cancel), values=values)
+
+    def cancel(self):
+        self.worker.cancel()
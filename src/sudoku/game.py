@@ -8,10 +8,12 @@ import core.ui
 from core.app import Application
 from core.action import ActionManager
 from core.ui import ButtonGrid, TabController
-from sudoku.grid import InputMode
+from sudoku.grid import ArrayGrid, InputMode
 from sudoku.board import Board
 from sudoku.level import Level, LevelList, random_sudoku, generate_level_id
+from sudoku.hint import Hint, HintService
 from sudoku.score import Highscore
+from sudoku.solution import SolutionCache, SolutionService
 from sudoku.settings import SettingsPanel
 
 DIM_MATS = \
@@ -57,6 +59,9 @@ class Game(Application):
         self.tabs = TabController()
         self.paused = False
         self.win = False
+        self.hints = HintService()
+        self.solutions = SolutionService()
+        self.level_hash = None
 
         self.main_panel = None
         self.game_panel = None
@@ -74,6 +79,7 @@ class Game(Application):
         self.init_events()
 
         self.loaded_id = None
+        self.loaded_from_file = False
         self.loaded_level = random_sudoku()
         self.load_level(self.loaded_level)
 
@@ -97,14 +103,15 @@ class Game(Application):
             menu_rect.topright, (side_rect.w - input_rect.w - menu_rect.w, side_rect.h)
         )
 
+        # Array backed, so the snapshots taken for hints are plain array copies
         self.board = Board(
             main_rect.topleft, main_rect.height, main_rect.height / 11,
-            self.sprites, self.ui_manager, title_height=main_rect.height / 22
+            self.sprites, self.ui_manager, title_height=main_rect.height / 22, grid=ArrayGrid(), check_dead_ends=True
         )
 
         self.side_panel = UIContainer(Rect(side_rect.topleft, side_rect.size), self.ui_manager)
 
-        self.input = ButtonGrid((4, 4), input_rect, 5, self.ui_manager, self.side_panel)
+        self.input = ButtonGrid((4, 5), input_rect, 5, self.ui_manager, self.side_panel)
         self.input.add_button("7", "7", keys=[pg.K_7, pg.K_KP7])
         self.input.add_button("8", "8", keys=[pg.K_8, pg.K_KP8])
         self.input.add_button("9", "9", keys=[pg.K_9, pg.K_KP9])
@@ -121,6 +128,7 @@ class Game(Application):
         self.input.add_button("Redo", "redo")
         self.input.add_button("Check", "check")
         self.input.add_button("Reset", "reset")
+        self.input.add_button("Hint", "hint")
         self.board.set_focusable_areas(self.board.grid_rect, self.input.rect)
 
         self.menu = ButtonGrid((4, 1) if vertical else (1, 4), menu_rect, 5, self.ui_manager, self.side_panel)
@@ -138,6 +146,8 @@ class Game(Application):
         self.settings = SettingsPanel(desc_rect, self.ui_manager, self.side_panel)
         self.settings.add_setting("Fullscreen", "fullscreen")
         self.settings.add_setting("Toggle highlight", "highlight", True)
+        self.settings.add_setting("Auto candidates", "auto_candidates")
+        self.settings.add_setting("Check progress", "check_progress")
 
         self.tabs.add_tab(self.rule_desc)
         self.tabs.add_tab(self.controls)
@@ -192,14 +202,25 @@ class Game(Application):
         self.tabs.on_tab_switched.add_handler(self.settings.discard_changes)
 
         self.board.on_won.add_handler(self.handle_win)
+        self.board.on_solvable_changed.add_handler(self.handle_solvable_changed)
 
     def reset(self):
-        self.load_level(self.loaded_level, self.loaded_id)
+        self.load_level(self.loaded_level, self.loaded_id, self.loaded_from_file)
 
-    def load_level(self, level: Level, level_id: str = None):
+    def load_level(self, level: Level, level_id: str = None, from_file: bool = None):
+        """level_id: The level's file name. Random puzzles get a generated one
+        from_file: Whether the level comes from a level file, which is when it has a level_id unless told otherwise"""
+        self.hints.cancel()
         self.loaded_id = level_id or generate_level_id()
+        self.loaded_from_file = level_id is not None if from_file is None else from_file
         self.loaded_level = level
 
+        # Solve in the background, mistakes are spotted once the solution arrives
+        self.level_hash = level.content_hash
+        self.board.set_solution(None)
+        # Random puzzles won't come back, so their solutions aren't written to disk
+        self.solutions.request(level, self.level_hash, persist=self.loaded_from_file)
+
         # Load rules
         self.board.rule_manager.clear_rule()
         self.board.rule_manager.add_rule(level.ruleset)
@@ -209,9 +230,7 @@ class Game(Application):
 
         # Load initial values
         self.board.unlock()
-        self.board.grid.clear()
-        for pos, val in level.start_values.items():
-            self.board.fill_tiles(val, [pos], InputMode.INPUT_MODE_VALUE, lock=True, no_record=True)
+        self.board.load_values(level.start_values, lock=True)
 
         self.win = False
         self.board.playing = False
@@ -236,6 +255,30 @@ class Game(Application):
             (" (NEW RECORD)" if new_best else " (COMPLETED)")
         )
 
+    def handle_solvable_changed(self, solvable: bool | None):
+        if self.win or self.paused:
+            return
+        print(f"[Game]: Solvable = {solvable}")
+        self.board.title.set_text(self.board.title_text.upper() + (" (DEAD END)" if solvable is False else ""))
+
+    def request_hint(self):
+        self.hints.request(self.board.grid.snapshot(), self.board.rule_manager.active_rules)
+
+    def show_hint(self, hint: Hint | None, values: dict[tuple[int, int], int]):
+        # The player kept going while the hint was worked out
+        if values != self.board.grid.get_numbered_tiles() or self.win or self.paused:
+            return
+
+        print(f"[Game]: Hint: {hint}")
+        if not hint:
+            self.board.title.set_text(self.board.title_text.upper() + " (NO HINT FOUND)")
+            return
+
+        self.board.selection.clear()
+        for pos in hint.tiles:
+            self.board.selection.select(pos)
+        self.board.title.set_text(self.board.title_text.upper() + f" ({str(hint).upper()})")
+
     def pause(self):
         if self.paused and not self.win:
             self.paused = False
@@ -263,6 +306,13 @@ class Game(Application):
                     case pg.K_y:
                         if not self.paused and evt.mod & pg.KMOD_CTRL:
                             ActionManager.redo()
+            case HintService.HINT_READY:
+                self.show_hint(evt.result, evt.values)
+            case LevelList.LEVELS_RATED:
+                self.level_list.set_ratings(evt.result)
+            case SolutionService.SOLUTION_READY:
+                if evt.level_hash == self.level_hash:
+                    self.board.set_solution(evt.result)
 
         self.board.process_events(evt)
 
@@ -271,6 +321,10 @@ class Game(Application):
             self.set_fullscreen(changes["fullscreen"])
         if "highlight" in changes:
             self.board.set_enable_highlight(changes["highlight"])
+        if "auto_candidates" in changes:
+            self.board.set_enable_auto_candidates(changes["auto_candidates"])
+        if "check_progress" in changes:
+            self.board.set_check_progress(changes["check_progress"])
 
     def handle_menu_buttons(self, button_id: str):
         match button_id:
@@ -303,8 +357,17 @@ class Game(Application):
             case "check":
                 if not self.win and not self.paused:
                     self.board.check_win_conditions()
+                if not self.win and not self.paused and self.board.solution:
+                    mistakes = len(self.board.mistakes)
+                    self.board.title.set_text(
+                        self.board.title_text.upper() +
+                        (f" ({mistakes} MISTAKE(S))" if mistakes else " (NO MISTAKES)")
+                    )
             case "reset":
                 self.reset()
+            case "hint":
+                if not self.win and not self.paused:
+                    self.request_hint()
 
     def _update(self, dt):
         self.board.update()
@@ -315,7 +378,12 @@ class Game(Application):
 
     def init(self):
         Highscore.load()
+        SolutionCache.load()
         core.ui.init()
 
     def cleanup(self):
         Highscore.save()
+        self.solutions.cancel()
+        self.board.dead_ends.cancel()
+        self.level_list.worker.cancel()
+        SolutionCache.save()
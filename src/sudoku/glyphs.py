@@ -0,0 +1,88 @@
+from enum import IntEnum
+
+from pygame import Surface, SRCALPHA
+from pygame.font import Font
+from pygame.rect import Rect
+from pygame.transform import smoothscale
+
+from .rules.rule import ALL_DIGITS
+
+# Widest row of the atlas, in tiles
+ATLAS_TILES_PER_ROW = 16
+
+
+class GlyphStyle(IntEnum):
+    NORMAL = 0
+    LOCKED = 1
+    CONFLICT = 2
+
+
+class GlyphAtlas:
+    """
+    Every digit in every style, and the pencil mark layout of every 9-bit mark, pre-rendered for one tile size
+    and packed into a single surface, so drawing a tile's text is one blit.
+    Atlases are built on first use and shared by all boards drawing tiles of that size.
+    """
+
+    VALUE_COLORS = (255, 255, 255), (140, 160, 160), (255, 0, 0)
+    MARK_COLOR = 255, 255, 255
+
+    __atlases: dict[tuple[int, int], "GlyphAtlas"] = {}
+
+    @staticmethod
+    def get(tile_size: tuple[int, int], value_font: Font, mark_font: Font) -> "GlyphAtlas":
+        atlas = GlyphAtlas.__atlases.get(tile_size)
+        if atlas is None:
+            atlas = GlyphAtlas.__atlases[tile_size] = GlyphAtlas(tile_size, value_font, mark_font)
+            print(f"[Glyph Atlas]: Built {len(atlas.rects)} glyphs for {tile_size[0]}x{tile_size[1]} tiles, "
+                  f"{atlas.get_memory_size() / 1024:.0f} KiB.")
+        return atlas
+
+    def __init__(self, tile_size: tuple[int, int], value_font: Font, mark_font: Font):
+        self.tile_size = tile_size
+
+        # Indexed by style * 9 + digit - 1 for digits, then 27 + mark for pencil marks
+        glyphs = [
+            self.__render(value_font, str(digit), color)
+            for color in GlyphAtlas.VALUE_COLORS for digit in range(1, 10)
+        ]
+        glyphs += [
+            self.__render(mark_font, ''.join(str(i + 1) for i in range(9) if 1 << i & mark), GlyphAtlas.MARK_COLOR)
+            for mark in range(ALL_DIGITS + 1)
+        ]
+
+        # Shelf packing, rows as wide as ATLAS_TILES_PER_ROW tiles
+        max_width = max(tile_size[0] * ATLAS_TILES_PER_ROW, max(_.get_width() for _ in glyphs))
+        self.rects: list[Rect] = []
+        x = y = shelf_height = 0
+        for glyph in glyphs:
+            if x + glyph.get_width() > max_width:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            self.rects.append(Rect((x, y), glyph.get_size()))
+            x += glyph.get_width()
+            shelf_height = max(shelf_height, glyph.get_height())
+
+        self.surface = Surface((max_width, y + shelf_height), SRCALPHA)
+        for glyph, rect in zip(glyphs, self.rects):
+            self.surface.blit(glyph, rect)
+
+    def __render(self, font: Font, text: str, color: tuple[int, int, int]) -> Surface:
+        text = font.render(text, True, color)
+        return smoothscale(text, (text.get_width() * self.tile_size[0] / 64, text.get_height() * self.tile_size[1] / 64))
+
+    def get_memory_size(self) -> int:
+        return self.surface.get_bytesize() * self.surface.get_width() * self.surface.get_height()
+
+    def draw_value(self, surface: Surface, digit: int, style: GlyphStyle, pxpos: tuple[float, float]):
+        """Draws a digit centered in the tile at pxpos."""
+        self.__draw(surface, self.rects[style * 9 + digit - 1], pxpos)
+
+    def draw_mark(self, surface: Surface, mark: int, pxpos: tuple[float, float]):
+        """Draws the pencil marks of a 9-bit mark centered in the tile at pxpos."""
+        self.__draw(surface, self.rects[27 + mark], pxpos)
+
+    def __draw(self, surface: Surface, rect: Rect, pxpos: tuple[float, float]):
+        surface.blit(self.surface, (
+            pxpos[0] + self.tile_size[0] / 2 - rect.w / 2,
+            pxpos[1] + self.tile_size[1] / 2 - rect.h / 2
+        ), rect)
@@ -1,5 +1,8 @@
+from contextlib import contextmanager
 from enum import Enum
 
+import numpy as np
+
 from core.action import new_action, Action
 from core.event import Event
 
@@ -21,6 +24,25 @@ class Tile:
         self.highlight = False
 
 
+class GridSnapshot:
+
+    def __init__(self, values: np.ndarray, marks: np.ndarray, colors: np.ndarray, locked: int):
+        """
+        A copy of a whole grid's state.
+        :param values: (9, 9) uint8 array of values, indexed [y, x]
+        :param marks: (9, 9) uint16 array of mark bitmasks
+        :param colors: (9, 9) uint8 array of color indices
+        :param locked: Bitmask of the locked tiles, bit y * 9 + x
+        """
+        self.values = values
+        self.marks = marks
+        self.colors = colors
+        self.locked = locked
+
+    def get_numbered_tiles(self) -> dict[tuple[int, int], int]:
+        return {(x, y): value for y, row in enumerate(self.values.tolist()) for x, value in enumerate(row) if value}
+
+
 class BoardInputAction(Action):
 
     def __init__(self, **data):
@@ -31,24 +53,26 @@ class BoardInputAction(Action):
         self.value = data['new_value']
 
     def redo(self):
-        for pos in self.old_values.keys():
-            match self.mode:
-                case InputMode.INPUT_MODE_VALUE:
-                    self.grid.set_value(pos, self.value)
-                case InputMode.INPUT_MODE_MARK:
-                    self.grid.set_mark(pos, self.value)
-                case InputMode.INPUT_MODE_COLOR:
-                    self.grid.set_color(pos, self.value)
+        with self.grid.batch():
+            for pos in self.old_values.keys():
+                match self.mode:
+                    case InputMode.INPUT_MODE_VALUE:
+                        self.grid.set_value(pos, self.value)
+                    case InputMode.INPUT_MODE_MARK:
+                        self.grid.set_mark(pos, self.value)
+                    case InputMode.INPUT_MODE_COLOR:
+                        self.grid.set_color(pos, self.value)
 
     def undo(self):
-        for pos, old in self.old_values.items():
-            match self.mode:
-                case InputMode.INPUT_MODE_VALUE:
-                    self.grid.set_value(pos, old)
-                case InputMode.INPUT_MODE_MARK:
-                    self.grid.set_mark(pos, old)
-                case InputMode.INPUT_MODE_COLOR:
-                    self.grid.set_color(pos, old)
+        with self.grid.batch():
+            for pos, old in self.old_values.items():
+                match self.mode:
+                    case InputMode.INPUT_MODE_VALUE:
+                        self.grid.set_value(pos, old)
+                    case InputMode.INPUT_MODE_MARK:
+                        self.grid.set_mark(pos, old)
+                    case InputMode.INPUT_MODE_COLOR:
+                        self.grid.set_color(pos, old)
 
 
 class Grid:
@@ -59,12 +83,55 @@ class Grid:
 
         # Control properties
         self.__tile_filled = 0
+        self.__batch_depth = 0
+        self.__old_values: dict[tuple[int, int], int] = {}
+        self.__new_values: dict[tuple[int, int], int] = {}
+        self.__changed: set[tuple[int, int]] = set()
 
         # Components
-        self.tiles = [[Tile() for x in range(self.tlw)] for y in range(self.tlh)]
+        self.tiles = self._create_tiles()
 
         # Events
         self.on_changed = Event()
+        self.on_loaded = Event()
+
+    def _create_tiles(self) -> list[list[Tile]]:
+        return [[Tile() for x in range(self.tlw)] for y in range(self.tlh)]
+
+    @contextmanager
+    def batch(self):
+        """Groups changes made inside the block so that they are reported once, when the outermost batch exits.
+        Value changes are reported first as (new_values, old_values), then all changed tiles as (positions)."""
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            if not self.__batch_depth:
+                self.__flush()
+
+    def __flush(self):
+        old_values, new_values = self.__old_values, self.__new_values
+        self.__old_values, self.__new_values = {}, {}
+
+        if old_values:
+            # Tiles changed by the value handlers (e.g. conflict highlights) join the same redraw
+            self.__batch_depth += 1
+            self.on_changed(new_values=new_values, old_values=old_values)
+            self.__batch_depth -= 1
+
+        changed, self.__changed = self.__changed, set()
+        if changed:
+            self.on_changed(positions=changed)
+
+    def _record(self, pos: tuple[int, int], old_value: int = None, new_value: int = None):
+        if old_value is not None:
+            self.__old_values.setdefault(pos, old_value)
+            self.__new_values[pos] = new_value
+        self.__changed.add(pos)
+
+        if not self.__batch_depth:
+            self.__flush()
 
     def set_value(self, pos: tuple[int, int], value: int, lock=False):
         tile = self.tiles[pos[1]][pos[0]]
@@ -76,7 +143,7 @@ class Grid:
 
             tile.value = 0 if value == old_value else value
             self.__tile_filled += bool(tile.value) - bool(old_value)
-            self.on_changed(new_val=value, old_values={pos: old_value}, positions={pos})
+            self._record(pos, old_value, tile.value)
 
         return old_value
 
@@ -85,7 +152,7 @@ class Grid:
         old_value = tile.mark
         tile.mark = value
 
-        self.on_changed(positions={pos})
+        self._record(pos)
         return old_value
 
     def toggle_mark(self, pos: tuple[int, int], value: int):
@@ -97,20 +164,21 @@ class Grid:
         old_value = tile.color
         tile.color = 0 if value == old_value else value
 
-        self.on_changed(positions={pos})
+        self._record(pos)
         return old_value
 
     @new_action(BoardInputAction)
     def fill_tiles(self, value: int, mode: InputMode, tiles: list | set, **kwargs):
         old_values = {}
-        for pos in tiles:
-            match mode:
-                case InputMode.INPUT_MODE_VALUE:
-                    old_values[pos] = self.set_value(pos, value, **kwargs)
-                case InputMode.INPUT_MODE_MARK:
-                    old_values[pos] = self.toggle_mark(pos, value)
-                case InputMode.INPUT_MODE_COLOR:
-                    old_values[pos] = self.set_color(pos, value)
+        with self.batch():
+            for pos in tiles:
+                match mode:
+                    case InputMode.INPUT_MODE_VALUE:
+                        old_values[pos] = self.set_value(pos, value, **kwargs)
+                    case InputMode.INPUT_MODE_MARK:
+                        old_values[pos] = self.toggle_mark(pos, value)
+                    case InputMode.INPUT_MODE_COLOR:
+                        old_values[pos] = self.set_color(pos, value)
 
         return {'component': self, 'input_mode': mode, 'old_values': old_values, 'new_value': value}
 
@@ -122,14 +190,52 @@ class Grid:
 
     def clear(self):
         self.__tile_filled = 0
-        for y in range(self.tlh):
-            for x in range(self.tlw):
-                self.tiles[y][x].value = 0
-                self.tiles[y][x].mark = 0
-                self.tiles[y][x].color = 0
-                self.tiles[y][x].locked = False
-
-        self.on_changed(positions={(x, y) for y in range(self.tlh) for x in range(self.tlw)})
+        with self.batch():
+            for y in range(self.tlh):
+                for x in range(self.tlw):
+                    self.tiles[y][x].value = 0
+                    self.tiles[y][x].mark = 0
+                    self.tiles[y][x].color = 0
+                    self.tiles[y][x].locked = False
+                    self._record((x, y))
+
+    def load(self, values: dict[tuple[int, int], int], lock=False):
+        """Replaces every tile at once. Value handlers are told through on_loaded instead of per tile changes."""
+        with self.batch():
+            for y in range(self.tlh):
+                for x in range(self.tlw):
+                    tile = self.tiles[y][x]
+                    tile.value = values.get((x, y), 0)
+                    tile.mark = 0
+                    tile.color = 0
+                    tile.locked = lock and bool(tile.value)
+                    self._record((x, y))
+
+            self.__tile_filled = sum(1 for value in values.values() if value)
+            self.on_loaded(values=values)
+
+    def snapshot(self) -> GridSnapshot:
+        return GridSnapshot(
+            np.array([[tile.value for tile in row] for row in self.tiles], dtype=np.uint8),
+            np.array([[tile.mark for tile in row] for row in self.tiles], dtype=np.uint16),
+            np.array([[tile.color for tile in row] for row in self.tiles], dtype=np.uint8),
+            sum(1 << (y * self.tlw + x) for y in range(self.tlh) for x in range(self.tlw) if self.tiles[y][x].locked)
+        )
+
+    def restore(self, snapshot: GridSnapshot):
+        """Replaces every tile with the snapshot's state. Value handlers are told through on_loaded."""
+        with self.batch():
+            for y in range(self.tlh):
+                for x in range(self.tlw):
+                    tile = self.tiles[y][x]
+                    tile.value = int(snapshot.values[y, x])
+                    tile.mark = int(snapshot.marks[y, x])
+                    tile.color = int(snapshot.colors[y, x])
+                    tile.locked = bool(snapshot.locked >> (y * self.tlw + x) & 1)
+                    self._record((x, y))
+
+            self.__tile_filled = int(np.count_nonzero(snapshot.values))
+            self.on_loaded(values=snapshot.get_numbered_tiles())
 
     def highlight_conflicts(self, conflicts: set, old_conflicts: set):
         changed_conflicts = conflicts.difference(old_conflicts)
@@ -140,4 +246,151 @@ class Grid:
         for cx, cy in changed_conflicts:
             self.tiles[cy][cx].highlight = True
 
-        self.on_changed(positions=changed_conflicts | changed_nonconflicts)
+        with self.batch():
+            for pos in changed_conflicts | changed_nonconflicts:
+                self._record(pos)
+
+
+class ArrayTile:
+    """Read-only view of one tile of an ArrayGrid, so it can be drawn like a Tile."""
+    __slots__ = ('grid', 'x', 'y')
+
+    def __init__(self, grid, x: int, y: int):
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    @property
+    def value(self) -> int:
+        return self.grid.values.item(self.y, self.x)
+
+    @property
+    def mark(self) -> int:
+        return self.grid.marks.item(self.y, self.x)
+
+    @property
+    def color(self) -> int:
+        return self.grid.colors.item(self.y, self.x)
+
+    @property
+    def locked(self) -> bool:
+        return bool(self.grid.locked >> (self.y * 9 + self.x) & 1)
+
+    @property
+    def highlight(self) -> bool:
+        return self.grid.highlights.item(self.y, self.x)
+
+
+class ArrayGrid(Grid):
+    """
+    A Grid that stores its tiles as NumPy arrays instead of Tile objects.
+    Whole-board reads and snapshot copies are cheap, which suits solvers, autosaves and analysis tools.
+    """
+
+    def __init__(self):
+        self.values = np.zeros((9, 9), dtype=np.uint8)
+        self.marks = np.zeros((9, 9), dtype=np.uint16)
+        self.colors = np.zeros((9, 9), dtype=np.uint8)
+        self.highlights = np.zeros((9, 9), dtype=bool)
+        self.locked = 0
+
+        super().__init__()
+
+    def _create_tiles(self) -> list[list[ArrayTile]]:
+        return [[ArrayTile(self, x, y) for x in range(self.tlw)] for y in range(self.tlh)]
+
+    def set_value(self, pos: tuple[int, int], value: int, lock=False):
+        x, y = pos
+        bit = 1 << (y * self.tlw + x)
+        old_value = self.values.item(y, x)
+
+        if not self.locked & bit:
+            if lock:
+                self.locked |= bit
+
+            new_value = 0 if value == old_value else value
+            self.values[y, x] = new_value
+            self._record(pos, old_value, new_value)
+
+        return old_value
+
+    def set_mark(self, pos: tuple[int, int], value: int):
+        x, y = pos
+        old_value = self.marks.item(y, x)
+        self.marks[y, x] = value
+
+        self._record(pos)
+        return old_value
+
+    def toggle_mark(self, pos: tuple[int, int], value: int):
+        x, y = pos
+        return self.set_mark(pos, self.marks.item(y, x) ^ 1 << (value - 1) if value else 0)
+
+    def set_color(self, pos: tuple[int, int], value: int):
+        x, y = pos
+        old_value = self.colors.item(y, x)
+        self.colors[y, x] = 0 if value == old_value else value
+
+        self._record(pos)
+        return old_value
+
+    def get_numbered_tiles(self) -> dict[tuple[int, int], int]:
+        # Read as plain ints at once, indexing the array per tile is slower than walking Tile objects
+        return {(x, y): value for y, row in enumerate(self.values.tolist()) for x, value in enumerate(row) if value}
+
+    def is_complete(self) -> bool:
+        return bool(self.values.all())
+
+    def clear(self):
+        with self.batch():
+            self.values.fill(0)
+            self.marks.fill(0)
+            self.colors.fill(0)
+            self.locked = 0
+            for y in range(self.tlh):
+                for x in range(self.tlw):
+                    self._record((x, y))
+
+    def load(self, values: dict[tuple[int, int], int], lock=False):
+        with self.batch():
+            self.values.fill(0)
+            self.marks.fill(0)
+            self.colors.fill(0)
+            self.locked = 0
+            for (x, y), value in values.items():
+                self.values[y, x] = value
+                if lock and value:
+                    self.locked |= 1 << (y * self.tlw + x)
+            for y in range(self.tlh):
+                for x in range(self.tlw):
+                    self._record((x, y))
+
+            self.on_loaded(values=values)
+
+    def snapshot(self) -> GridSnapshot:
+        return GridSnapshot(self.values.copy(), self.marks.copy(), self.colors.copy(), self.locked)
+
+    def restore(self, snapshot: GridSnapshot):
+        with self.batch():
+            self.values[:] = snapshot.values
+            self.marks[:] = snapshot.marks
+            self.colors[:] = snapshot.colors
+            self.locked = snapshot.locked
+            for y in range(self.tlh):
+                for x in range(self.tlw):
+                    self._record((x, y))
+
+            self.on_loaded(values=snapshot.get_numbered_tiles())
+
+    def highlight_conflicts(self, conflicts: set, old_conflicts: set):
+        changed_conflicts = conflicts.difference(old_conflicts)
+        changed_nonconflicts = old_conflicts.difference(conflicts)
+
+        for cx, cy in changed_nonconflicts:
+            self.highlights[cy, cx] = False
+        for cx, cy in changed_conflicts:
+            self.highlights[cy, cx] = True
+
+        with self.batch():
+            for pos in changed_conflicts | changed_nonconflicts:
+                self._record(pos)
@@ -0,0 +1,77 @@
+import copy
+from threading import Event
+
+import pygame as pg
+
+from core.worker import BackgroundWorker
+from .grid import GridSnapshot
+from .rules.rule import Rule, POSITIONS
+from .solver import LogicalSolver, Technique
+
+
+class Hint:
+
+    def __init__(
+            self, technique: Technique | None,
+            placements: dict[tuple[int, int], int] = None,
+            eliminations: dict[tuple[int, int], set[int]] = None
+    ):
+        """technique: Technique that makes progress, None when the grid already breaks the rules
+        placements: The first empty tile, in reading order, whose digit follows from it
+        eliminations: Candidates it rules out, per tile"""
+        self.technique = technique
+        self.placements = placements or {}
+        self.eliminations = eliminations or {}
+
+    @property
+    def tiles(self) -> set[tuple[int, int]]:
+        if self.placements:
+            return set(self.placements)
+        return set(self.eliminations)
+
+    def __str__(self):
+        if not self.technique:
+            return "Mistake somewhere"
+        if self.placements:
+            (x, y), value = next(iter(self.placements.items()))
+            return f"{self.technique.label}: R{y + 1}C{x + 1} is {value}"
+        return f"{self.technique.label}: {sum(len(_) for _ in self.eliminations.values())} candidate(s) removed"
+
+
+def find_hint(ruleset: set[Rule], values: dict[tuple[int, int], int], cancel: Event = None) -> Hint | None:
+    """The next logical step from the given values, or None when no known technique applies."""
+    try:
+        step = LogicalSolver(ruleset).next_step(values, cancel)
+    except ValueError:
+        return Hint(None)
+    if step is None:
+        return None
+
+    technique, before, after = step
+    placements, eliminations = {}, {}
+    for i, pos in enumerate(POSITIONS):
+        if values.get(pos):
+            continue
+        if not placements and not after[i] & (after[i] - 1):
+            placements[pos] = after[i].bit_length()
+        if removed := before[i] & ~after[i]:
+            eliminations[pos] = {d + 1 for d in range(9) if removed >> d & 1}
+    return Hint(technique, placements, eliminations)
+
+
+class HintService:
+    """Looks for hints on a background thread. Answers arrive as HINT_READY events with `result` and `values`."""
+
+    HINT_READY = pg.event.custom_type()
+
+    def __init__(self):
+        self.worker = BackgroundWorker(HintService.HINT_READY, "Hint Service")
+
+    def request(self, snapshot: GridSnapshot, ruleset: set[Rule]):
+        values = snapshot.get_numbered_tiles()
+        # Copied, the rules keep being updated while the hint is looked for
+        ruleset = copy.deepcopy(ruleset)
+        self.worker.submit(lambda cancel: find_hint(ruleset, values, cancel), values=values)
+
+    def cancel(self):
+        self.worker.cancel()
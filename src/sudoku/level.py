@@ -1,18 +1,23 @@
+import hashlib
 import os
 import random
 import numpy as np
 import pickle
 import json
 from datetime import datetime
+from threading import Event as CancelEvent
 
+import pygame as pg
 from pygame import Rect
 from pygame_gui.core.interfaces import IUIManagerInterface
 from pygame_gui.elements import UIPanel, UISelectionList
 
-from .rules.rule import Rule
+from .rules.rule import Rule, ComponentRule
 from .rules.global_rules import SudokuRule
+from .solver import Rating, rate_level
 from core.event import Event
 from core.ui import ButtonGrid
+from core.worker import BackgroundWorker
 
 
 def generate_level_id() -> str:
@@ -46,13 +51,41 @@ class Level:
     def start_values(self):
         return self.__start_values
 
+    @property
+    def content_hash(self) -> str:
+        """Identifies the puzzle by its rules and clues, whatever its name or file."""
+        rules = sorted(
+            type(rule).__name__ + ''.join(
+                repr(sorted(_.data) if isinstance(_.data, set) else _.data) for _ in rule.get_properties()
+            ) if isinstance(rule, ComponentRule) else type(rule).__name__
+            for rule in self.__ruleset
+        )
+        return hashlib.sha1(('/'.join(rules) + '/' + format_seed(self.__start_values)).encode()).hexdigest()
+
+
+def rate_levels(levels: list[Level], cancel: CancelEvent = None) -> dict[str, Rating]:
+    """Ratings by content hash, as many as were done before being cancelled."""
+    ratings = {}
+    for level in levels:
+        if cancel is not None and cancel.is_set():
+            break
+        ratings[level.content_hash] = rate_level(level)
+    return ratings
+
 
 class LevelList(UIPanel):
+    """Levels are listed as soon as they are read, and rated on a background thread.
+    Ratings arrive as LEVELS_RATED events with `result`, to be passed to set_ratings."""
+
     LEVELS_PATH = "data/levels"
+    LEVELS_RATED = pg.event.custom_type()
+    # Ratings by level content hash, so levels are only rated once per run
+    __ratings: dict[str, Rating] = {}
 
     def __init__(self, relative_rect: Rect, manager: IUIManagerInterface, container=None):
         super().__init__(relative_rect, 0, manager, container=container)
         self.levels = []
+        self.worker = BackgroundWorker(LevelList.LEVELS_RATED, "Level Rater")
         self.level_list = UISelectionList(
             Rect(0, 0, self.relative_rect.w, self.relative_rect.h - 30),
             [], manager, container=self
@@ -82,11 +115,28 @@ class LevelList(UIPanel):
     def load_levels(self):
         filenames = [_ for _ in os.listdir(LevelList.LEVELS_PATH) if _.endswith('.dat')]
 
+        self.levels = []
         for name in filenames:
             with open(f"{LevelList.LEVELS_PATH}/{name}", 'rb') as f:
-                self.levels += [(name, pickle.load(f))]
-
-        self.level_list.set_item_list([_[1].name for _ in self.levels])
+                level = pickle.load(f)
+                self.levels += [(name, level, LevelList.__ratings.get(level.content_hash))]
+        self.__show_levels()
+
+        unrated = [level for _, level, rating in self.levels if rating is None]
+        if unrated:
+            self.worker.submit(lambda cancel: rate_levels(unrated, cancel))
+
+    def set_ratings(self, ratings: dict[str, Rating]):
+        LevelList.__ratings.update(ratings)
+        self.levels = [(name, level, LevelList.__ratings.get(level.content_hash)) for name, level, _ in self.levels]
+        self.__show_levels()
+
+    def __show_levels(self):
+        # Easiest first, levels still being rated last
+        self.levels.sort(key=lambda _: (_[2] is None, _[2].score if _[2] else 0))
+        self.level_list.set_item_list([
+            f"{_[1].name} ({_[2].difficulty if _[2] else 'rating...'})" for _ in self.levels
+        ])
 
     def handle_button_pressed(self, button_id: str):
         match button_id:
@@ -122,6 +172,22 @@ def load_seeds():
 seeds = load_seeds() or []
 
 
+def parse_seed(seed: str) -> dict[tuple[int, int], int]:
+    """Reads a seed's clues, mapping its letters 'a' - 'i' to digits 1 - 9."""
+    return {
+        (x, y): ord(char) - ord('a') + 1
+        for y, row in enumerate(seed.split('|')) for x, char in enumerate(row) if char != '_'
+    }
+
+
+def format_seed(values: dict[tuple[int, int], int]) -> str:
+    """Writes clues in the seed format read by parse_seed."""
+    return '|'.join(
+        ''.join(chr(ord('a') + values[(x, y)] - 1) if values.get((x, y)) else '_' for x in range(9))
+        for y in range(9)
+    )
+
+
 def random_sudoku() -> Level:
     values = [_ for _ in range(1, 10)]
     random.shuffle(values)
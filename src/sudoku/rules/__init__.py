@@ -7,3 +7,4 @@ from .parity import ParityRule, OddRule, EvenRule
 from .palindrome import PalindromeRule
 from .thermometer import ThermometerRule
 from .arrow import ArrowRule
+from .compiled import Constraint, CompiledRuleset, validate_grids
@@ -3,7 +3,8 @@ from pygame.gfxdraw import aaellipse
 
 import numpy as np
 
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index, digit_range, min_digit, max_digit
+from .compiled import Constraint
 from core.gfx.graphics import Graphics
 from maker.properties import Properties, PropertiesType, PropertiesError
 
@@ -19,18 +20,53 @@ class ArrowRule(ComponentRule):
         if not bound_to:
             self.bound_to = [(0, 0), (1, 0)]
 
+        self.reset()
+
+    def reset(self):
         self.target = 0
         self.sum = 0
+        self.filled = set()
+        self.satisfied = False
+        self.violations = set()
 
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         if pos == self.bound_to[0]:
             self.target = new_val
         else:
             self.sum = self.sum - old_val + new_val
+        if new_val:
+            self.filled.add(pos)
+        else:
+            self.filled.discard(pos)
+        self.satisfied = self.sum == self.target != 0
+
+        # Every empty shaft tile adds 1 to 9 to the sum
+        empty = len(self.bound_to) - 1 - len(self.filled - {self.bound_to[0]})
+        lo, hi = self.sum + empty, self.sum + 9 * empty
+        broken = not lo <= self.target <= hi if self.target else lo > 9
+        self.violations = set(self.filled) if broken else set()
         print(f"[Arrow Rule]: Current sum = {self.sum}, target sum = {self.target}.")
 
-    def check(self) -> bool:
-        return self.sum == self.target != 0
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.ARROW, tuple(pos_to_index(pos) for pos in self.bound_to), 0)]
+
+    def propagate(self, candidates: list[int]) -> bool:
+        circle, *shaft = [pos_to_index(pos) for pos in self.bound_to]
+        lo = sum(min_digit(candidates[i]) for i in shaft)
+        hi = sum(max_digit(candidates[i]) for i in shaft)
+
+        c = candidates[circle] & digit_range(lo, hi)
+        if not c:
+            return False
+        candidates[circle] = c
+
+        for i in shaft:
+            s = candidates[i]
+            s &= digit_range(min_digit(c) - (hi - max_digit(s)), max_digit(c) - (lo - min_digit(s)))
+            if not s:
+                return False
+            candidates[i] = s
+        return True
 
     def get_properties(self) -> list[Properties]:
         return [
@@ -0,0 +1,218 @@
+from enum import IntEnum
+
+import numpy as np
+
+from .rule import Rule, GlobalRule, ComponentRule, POSITIONS, pos_to_index, mask_to_positions
+
+# Grids validated at once, bounding the (constraints, batch) work arrays in memory
+VALIDATE_BATCH_SIZE = 2048
+ALL_DIGIT_BITS = 0b1111111110
+
+
+class Constraint(IntEnum):
+    """Type codes of compiled constraints. Each applies to an ordered list of tiles and one integer parameter."""
+    DISTINCT = 0    # No digit repeats. A non-zero parameter is also the sum the tiles must add up to
+    ARROW = 1       # The first tile is the sum of the others
+    INCREASING = 2  # Strictly increasing along the tiles
+    PALINDROME = 3  # The tiles read the same both ways
+    RATIO = 4       # One of the two tiles is the parameter times the other
+    DIFFERENCE = 5  # The two tiles differ by the parameter
+    DIGITS = 6      # The tile holds one of the digits in the parameter's bitmask
+    CONTAINS = 7    # The tiles hold every digit in the parameter's bitmask
+
+
+class CompiledRuleset:
+    """
+    A ruleset flattened into cell-indexed arrays (tile index = y * 9 + x):
+    types[c], params[c] and cells[offsets[c]:offsets[c + 1]] describe constraint c, and
+    cell_constraints[cell_offsets[i]:cell_offsets[i + 1]] lists the constraints touching tile i.
+    Global rules compile to their houses, plus pairs for any peers the houses miss (e.g. anti-knight).
+    Evaluation gathers the values of same shaped constraints at once, so it works on any batch of grids.
+    """
+
+    # Global rules hold no per-instance state, so their constraints are compiled once per rule type
+    __global_constraints: dict[type, tuple] = {}
+
+    def __init__(self, ruleset: set[Rule]):
+        # Kept for what can't be flattened, like drawing and the component rules' own propagation
+        self.rules = frozenset(ruleset)
+
+        constraints = []
+        peers = [0] * 81
+        for rule in ruleset:
+            if isinstance(rule, GlobalRule):
+                constraints += CompiledRuleset.__compile_global(rule)
+                for i, mask in enumerate(rule.peer_masks()):
+                    peers[i] |= mask
+            elif isinstance(rule, ComponentRule):
+                constraints += rule.constraints()
+
+        # Identical houses from overlapping rules (e.g. rows of SudokuRule and RowRule) are only checked once
+        constraints = list(dict.fromkeys(constraints))
+
+        self.types = np.array([c[0] for c in constraints], dtype=np.int8)
+        self.params = np.array([c[2] for c in constraints], dtype=np.int32)
+        self.offsets = np.zeros(len(constraints) + 1, dtype=np.int32)
+        self.offsets[1:] = np.cumsum([len(c[1]) for c in constraints])
+        self.cells = np.array([i for c in constraints for i in c[1]], dtype=np.int16)
+
+        touching = [[] for _ in range(81)]
+        for c, (_, cells, _) in enumerate(constraints):
+            for i in dict.fromkeys(cells):
+                touching[i].append(c)
+        self.cell_offsets = np.zeros(82, dtype=np.int32)
+        self.cell_offsets[1:] = np.cumsum([len(_) for _ in touching])
+        self.cell_constraints = np.array([c for _ in touching for c in _], dtype=np.int32)
+
+        # Peers and houses for the solvers: tiles that can't share a digit, and groups holding every digit once
+        for rule in ruleset:
+            if isinstance(rule, ComponentRule):
+                for constraint_type, cells, _ in rule.constraints():
+                    if constraint_type is Constraint.DISTINCT:
+                        mask = sum(1 << i for i in cells)
+                        for i in cells:
+                            peers[i] |= mask & ~(1 << i)
+        self.peer_masks = tuple(peers)
+        self.houses = tuple(cells for constraint_type, cells, _ in constraints
+                            if constraint_type is Constraint.DISTINCT and len(cells) == 9)
+        self.exact_cover = all(t is Constraint.DISTINCT and len(c) == 9 and p in (0, 45) for t, c, p in constraints)
+
+        # Constraints of the same type and length, evaluated together as (n, length) index matrices
+        groups = {}
+        for c, (constraint_type, cells, _) in enumerate(constraints):
+            groups.setdefault((constraint_type, len(cells)), []).append(c)
+        self.groups = [
+            (constraint_type, np.array(ids), np.array([constraints[c][1] for c in ids]), self.params[ids])
+            for (constraint_type, _), ids in groups.items()
+        ]
+
+        # Constraints touching each tile, padded with len(self), which validate() treats as a constraint never broken
+        degree = max(1, max(len(_) for _ in touching))
+        self.tile_constraints = np.full((81, degree), len(constraints), dtype=np.int32)
+        for i, _ in enumerate(touching):
+            self.tile_constraints[i, :len(_)] = _
+
+    @staticmethod
+    def __compile_global(rule: GlobalRule) -> tuple:
+        compiled = CompiledRuleset.__global_constraints.get(type(rule))
+        if compiled is None:
+            compiled = []
+            covered = [0] * 81
+            for house in rule.houses():
+                cells = tuple(pos_to_index(pos) for pos in house)
+                compiled.append((Constraint.DISTINCT, cells, 0))
+                mask = sum(1 << i for i in cells)
+                for i in cells:
+                    covered[i] |= mask & ~(1 << i)
+
+            for i, mask in enumerate(rule.peer_masks()):
+                for pos in mask_to_positions(mask & ~covered[i] & ~((2 << i) - 1)):
+                    compiled.append((Constraint.DISTINCT, (i, pos_to_index(pos)), 0))
+            compiled = CompiledRuleset.__global_constraints[type(rule)] = tuple(compiled)
+        return compiled
+
+    def __len__(self):
+        return len(self.types)
+
+    def cells_of(self, constraint: int) -> np.ndarray:
+        return self.cells[self.offsets[constraint]:self.offsets[constraint + 1]]
+
+    def constraints_of(self, index: int) -> np.ndarray:
+        """Constraints touching the tile at y * 9 + x."""
+        return self.cell_constraints[self.cell_offsets[index]:self.cell_offsets[index + 1]]
+
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        """values: (..., 81) or (..., 9, 9) array of full grids
+        Returns a (..., len(self)) bool array telling which constraints each grid satisfies."""
+        values = np.asarray(values, dtype=np.int16)
+        values = values.reshape(values.shape[:-2] + (81,)) if values.shape[-2:] == (9, 9) else values
+        result = np.zeros(values.shape[:-1] + (len(self),), dtype=bool)
+
+        for constraint_type, ids, cells, params in self.groups:
+            result[..., ids] = CompiledRuleset.__check(constraint_type, values[..., cells], params)
+        return result
+
+    @staticmethod
+    def __check(constraint_type: Constraint, v: np.ndarray, params: np.ndarray) -> np.ndarray:
+        """v: (..., n, length) int16 values of n filled constraints of one type"""
+        match constraint_type:
+            case Constraint.DISTINCT:
+                ok = (np.diff(np.sort(v, axis=-1), axis=-1) != 0).all(axis=-1)
+                return ok & ((params == 0) | (v.sum(axis=-1) == params))
+            case Constraint.ARROW:
+                return v[..., 0] == v[..., 1:].sum(axis=-1)
+            case Constraint.INCREASING:
+                return (np.diff(v, axis=-1) > 0).all(axis=-1)
+            case Constraint.PALINDROME:
+                return (v == v[..., ::-1]).all(axis=-1)
+            case Constraint.RATIO:
+                return (v[..., 0] == params * v[..., 1]) | (v[..., 1] == params * v[..., 0])
+            case Constraint.DIFFERENCE:
+                return np.abs(v[..., 0] - v[..., 1]) == params
+            case Constraint.DIGITS:
+                return (1 << v[..., 0] >> 1 & params) != 0
+            case Constraint.CONTAINS:
+                return np.bitwise_or.reduce(1 << v >> 1, axis=-1) & params == params
+        raise ValueError(f"Unknown constraint type {constraint_type}.")
+
+    def validate(self, grids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """grids: (N, 9, 9) array of digits, 0 for empty tiles
+        Returns (valid, conflicts): an (N,) bool array, True for grids nothing is wrong with so far,
+        and an (N, 9, 9) bool array of the tiles breaking a constraint.
+        Repeated digits are caught as soon as they are entered, other constraints once all their tiles are filled."""
+        grids = np.asarray(grids, dtype=np.uint8).reshape(-1, 81)
+        conflicts = np.zeros(grids.shape, dtype=bool)
+        for start in range(0, len(grids), VALIDATE_BATCH_SIZE):
+            conflicts[start:start + VALIDATE_BATCH_SIZE] = self.__conflicts(grids[start:start + VALIDATE_BATCH_SIZE])
+        return ~conflicts.any(axis=1), conflicts.reshape(-1, 9, 9)
+
+    def __conflicts(self, grids: np.ndarray) -> np.ndarray:
+        # Tile-major (81, batch) layout, so gathering tiles copies whole rows
+        grids = np.ascontiguousarray(grids.T)
+        # Digit d as bit d, so empty tiles (bit 0) never match the masks below
+        bits = np.left_shift(1, grids, dtype=np.uint16)
+        # Per constraint, the digits of the tiles it flags. The extra last row stays 0 for the padding
+        flagged = np.zeros((len(self) + 1, grids.shape[1]), dtype=np.uint16)
+
+        for constraint_type, ids, cells, params in self.groups:
+            v = grids[cells]
+            filled = (v != 0).all(axis=1)
+            if constraint_type is Constraint.DISTINCT:
+                # Digits seen more than once along the constraint
+                b = bits[cells]
+                seen, repeated = b[:, 0].copy(), np.zeros_like(b[:, 0])
+                for slot in range(1, b.shape[1]):
+                    repeated |= seen & b[:, slot]
+                    seen |= b[:, slot]
+                repeated &= ~np.uint16(1)
+                if params.any():
+                    wrong_sum = filled & ((params != 0) & (v.sum(axis=1, dtype=np.int16).T != params)).T
+                    repeated[wrong_sum] = ALL_DIGIT_BITS
+                flagged[ids] = repeated
+            else:
+                ok = CompiledRuleset.__check(constraint_type, np.moveaxis(v, -1, 0).astype(np.int16), params)
+                flagged[ids] = np.where(filled & ~ok.T, ALL_DIGIT_BITS, 0)
+
+        tile_flagged = flagged[self.tile_constraints[:, 0]]
+        for column in range(1, self.tile_constraints.shape[1]):
+            tile_flagged |= flagged[self.tile_constraints[:, column]]
+        return (tile_flagged & bits).T != 0
+
+    def is_valid(self, values: np.ndarray) -> bool | np.ndarray:
+        """Whether full grids hold digits 1 - 9 everywhere and satisfy every constraint.
+        One bool for a single grid, a bool array for a batch."""
+        values = np.asarray(values)
+        flat = values.reshape(values.shape[:-2] + (81,)) if values.shape[-2:] == (9, 9) else values
+        valid = ((flat >= 1) & (flat <= 9)).all(axis=-1) & self.evaluate(flat).all(axis=-1)
+        return bool(valid) if valid.ndim == 0 else valid
+
+    def violated(self, values: np.ndarray) -> set[tuple[int, int]]:
+        """Tiles of the constraints a single full grid breaks."""
+        broken = np.flatnonzero(~self.evaluate(values))
+        return {POSITIONS[i] for c in broken for i in self.cells_of(c)}
+
+
+def validate_grids(grids: np.ndarray, ruleset: set[Rule] | CompiledRuleset) -> tuple[np.ndarray, np.ndarray]:
+    """Validates a (N, 9, 9) batch of full or partial grids, see CompiledRuleset.validate."""
+    compiled = ruleset if isinstance(ruleset, CompiledRuleset) else CompiledRuleset(ruleset)
+    return compiled.validate(grids)
@@ -1,7 +1,8 @@
 from pygame import Surface
 from pygame.gfxdraw import filled_circle, aacircle
 
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index, ALL_DIGITS
+from .compiled import Constraint
 from maker.properties import Properties, PropertiesType, PropertiesError
 
 
@@ -10,17 +11,45 @@ class DotRule(ComponentRule):
 
     def __init__(self, tile1: tuple[int, int] = (0, 0), tile2: tuple[int, int] = (1, 0)):
         super().__init__([tile1, tile2])
-        self.values = [0, 0]
+        self.reset()
 
     def __new__(cls, *args, **kwargs):
         if cls is DotRule:
             raise TypeError(f"Only childrens of {cls.__name__} shall be instantiated!")
         return super().__new__(cls)
 
+    def reset(self):
+        self.values = [0, 0]
+        self.satisfied = False
+        self.violations = set()
+
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         self.values[self.bound_to.index(pos)] = new_val
+        self.satisfied = 0 not in self.values and self.fits(*self.values)
+
+        # A lone digit breaks the dot when no digit can pair with it
+        value = self.values[0] or self.values[1]
+        if 0 in self.values:
+            broken = value and not self.supported(1 << (value - 1))
+        else:
+            broken = not self.satisfied
+        self.violations = {p for p, v in zip(self.bound_to, self.values) if v} if broken else set()
         print(f"[Dot rule]: Current values = {self.values}.")
 
+    def fits(self, value1: int, value2: int) -> bool:
+        """Whether two digits may sit on either side of the dot."""
+        return True
+
+    def propagate(self, candidates: list[int]) -> bool:
+        a, b = pos_to_index(self.bound_to[0]), pos_to_index(self.bound_to[1])
+        candidates[a] &= self.supported(candidates[b])
+        candidates[b] &= self.supported(candidates[a])
+        return bool(candidates[a] and candidates[b])
+
+    def supported(self, mask: int) -> int:
+        """Digits that can sit next to a tile holding one of the digits in mask."""
+        return ALL_DIGITS
+
     def get_properties(self) -> list[Properties]:
         return [
             Properties("Tile 1", PropertiesType.POS, self.bound_to[0]),
@@ -49,10 +78,17 @@ class BlackDotRule(DotRule):
     color = (0, 0, 0)
     stroke_color = (255, 255, 255)
 
-    def check(self) -> bool:
-        if 0 in self.values:
-            return False
-        return self.values[0] / self.values[1] in (2, .5)
+    def fits(self, value1: int, value2: int) -> bool:
+        return value1 == 2 * value2 or value2 == 2 * value1
+
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.RATIO, tuple(pos_to_index(pos) for pos in self.bound_to), 2)]
+
+    def supported(self, mask: int) -> int:
+        return sum(
+            1 << (d - 1) for d in range(1, 10)
+            if (d <= 4 and mask >> (2 * d - 1) & 1) or (d % 2 == 0 and mask >> (d // 2 - 1) & 1)
+        )
 
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         x, y = (self.bound_to[0][0] + self.bound_to[1][0]) / 2, (self.bound_to[0][1] + self.bound_to[1][1]) / 2
@@ -76,10 +112,14 @@ class WhiteDotRule(DotRule):
     color = (255, 255, 255)
     stroke_color = (0, 0, 0)
 
-    def check(self) -> bool:
-        if 0 in self.values:
-            return False
-        return abs(self.values[0] - self.values[1]) == 1
+    def fits(self, value1: int, value2: int) -> bool:
+        return abs(value1 - value2) == 1
+
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.DIFFERENCE, tuple(pos_to_index(pos) for pos in self.bound_to), 1)]
+
+    def supported(self, mask: int) -> int:
+        return (mask << 1 | mask >> 1) & ALL_DIGITS
 
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         x, y = (self.bound_to[0][0] + self.bound_to[1][0]) / 2, (self.bound_to[0][1] + self.bound_to[1][1]) / 2
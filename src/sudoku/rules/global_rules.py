@@ -7,6 +7,9 @@ class ColumnRule(GlobalRule):
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return p1[0] == p2[0]
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return tuple(tuple((x, y) for y in range(9)) for x in range(9))
+
 
 class RowRule(GlobalRule):
     DESCRIPTIONS = "Each row cannot contain the same digit."
@@ -14,6 +17,9 @@ class RowRule(GlobalRule):
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return p1[1] == p2[1]
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return tuple(tuple((x, y) for x in range(9)) for y in range(9))
+
 
 class BoxRule(GlobalRule):
     DESCRIPTIONS = "Each 3x3 box cannot contain the same digit."
@@ -21,6 +27,12 @@ class BoxRule(GlobalRule):
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return p1[0] // 3 == p2[0] // 3 and p1[1] // 3 == p2[1] // 3
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return tuple(
+            tuple((bx * 3 + x, by * 3 + y) for y in range(3) for x in range(3))
+            for by in range(3) for bx in range(3)
+        )
+
 
 class SudokuRule(GlobalRule):
     DESCRIPTIONS = "Normal sudoku rules apply."
@@ -34,6 +46,9 @@ class SudokuRule(GlobalRule):
                self.sub_rules[1].conflict(p1, p2) or \
                self.sub_rules[2].conflict(p1, p2)
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return sum((rule.houses() for rule in self.sub_rules), ())
+
 
 class MainDiagonalRule(GlobalRule):
     DESCRIPTIONS = "Main diagonal cannot contain the same digit."
@@ -41,6 +56,9 @@ class MainDiagonalRule(GlobalRule):
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return p1[0] == p1[1] and p2[0] == p2[1]
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return (tuple((i, i) for i in range(9)),)
+
 
 class AntiDiagonalRule(GlobalRule):
     DESCRIPTIONS = "Anti diagonal cannot contain the same digit."
@@ -48,6 +66,9 @@ class AntiDiagonalRule(GlobalRule):
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return p1[0] + p1[1] == p2[0] + p2[1] == 8
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return (tuple((i, 8 - i) for i in range(9)),)
+
 
 class DiagonalRule(GlobalRule):
     DESCRIPTIONS = "Each diagonal cannot contain the same digit."
@@ -59,6 +80,9 @@ class DiagonalRule(GlobalRule):
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return self.sub_rules[0].conflict(p1, p2) or self.sub_rules[1].conflict(p1, p2)
 
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        return sum((rule.houses() for rule in self.sub_rules), ())
+
 
 class KnightRule(GlobalRule):
     DESCRIPTIONS = "Cells separated by a knight's move (in chess) cannot contain the same digit."
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from functools import cache
 
 import numpy as np
@@ -8,10 +9,40 @@ from pygame.font import SysFont
 
 from core.gfx.graphics import Graphics
 from core.utils.mesh import MeshGrid
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index, ALL_DIGITS
+from .compiled import Constraint
 from maker.properties import Properties, PropertiesType, PropertiesError
 
 
+def _digit_sum(mask: int) -> int:
+    return sum(d + 1 for d in range(9) if mask >> d & 1)
+
+
+def build_cage_combinations() -> tuple[tuple[tuple[int, ...], ...], ...]:
+    table = [[[] for _ in range(46)] for _ in range(10)]
+    for mask in range(1, 1 << 9):
+        table[mask.bit_count()][_digit_sum(mask)].append(mask)
+    return tuple(tuple(tuple(combos) for combos in row) for row in table)
+
+
+# CAGE_COMBINATIONS[size][sum]: Digit masks of every set of distinct digits with that size and sum
+CAGE_COMBINATIONS = build_cage_combinations()
+
+
+@cache
+def cage_candidates(size: int, target: int, placed: int) -> int:
+    """Digits that can still fill a cage of `size` tiles summing to `target` (0 for no target),
+    given the mask of digits already placed in it."""
+    if not target:
+        return ALL_DIGITS & ~placed
+
+    candidates = 0
+    for combo in CAGE_COMBINATIONS[size][target] if target < 46 else ():
+        if combo & placed == placed:
+            candidates |= combo
+    return candidates & ~placed
+
+
 # ----- Data -----
 class KillerRule(ComponentRule):
     DESCRIPTIONS = "In cages, digits must sum to the small clue (if exists) in the top left corner of the cage. " \
@@ -20,6 +51,14 @@ class KillerRule(ComponentRule):
     # killer_tile_size = killer_tile_w, killer_tile_h = Tile.SIZE / 2, Tile.SIZE / 2
     killer_sprites = {}
     font = SysFont("Arial", 10)
+    # Generated sprites by (tile render size, style), and the same sprites scaled by (size, tile render size, style)
+    __meshes: dict[tuple, dict[int, Surface]] = {}
+    __scaled_meshes: dict[tuple, tuple[Surface, ...]] = {}
+    __mesh_key: tuple = None
+    # Composed cages by (tiles, target, tile size, style), least recently drawn first.
+    # Kept off the instances, which get pickled with levels, and bounded, since the maker makes a new shape per edit
+    CAGE_IMAGE_LIMIT = 256
+    __cage_images: OrderedDict[tuple, Surface] = OrderedDict()
     color = (255, 255, 255)
     # weight: float = .75
     # dash_len: float = 4.0
@@ -31,18 +70,76 @@ class KillerRule(ComponentRule):
         if not bound_to:
             self.bound_to = {(0, 0)}
 
-        self.sum = 0
         self.target = target_sum
+        self.reset()
+
+    def reset(self):
+        self.sum = 0
+        self.counts = [0] * 10
+        self.placed = 0
+        self.filled = set()
+        self.satisfied = not self.target
+        self.violations = set()
 
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         self.sum = self.sum - old_val + new_val
+
+        if old_val:
+            self.counts[old_val] -= 1
+            if not self.counts[old_val]:
+                self.placed &= ~(1 << (old_val - 1))
+        if new_val:
+            self.counts[new_val] += 1
+            self.placed |= 1 << (new_val - 1)
+        if new_val:
+            self.filled.add(pos)
+        else:
+            self.filled.discard(pos)
+        self.satisfied = self.sum == self.target if self.target else True
+
+        # A full cage must add up, a partial one must still leave a way to add up
+        if not self.target or not self.filled:
+            broken = False
+        elif len(self.filled) == len(self.bound_to):
+            broken = not self.satisfied
+        else:
+            broken = not self.candidates()
+        self.violations = set(self.filled) if broken else set()
         print(f"[Killer Rule]: Current sum = {self.sum}, target sum = {self.target}.")
 
+    def candidates(self) -> int:
+        """Digit mask of what can still go in the cage's empty tiles."""
+        return cage_candidates(len(self.bound_to), self.target, self.placed)
+
     def conflict(self, p1: tuple[int, int], p2: tuple[int, int]) -> bool:
         return p1 in self.bound_to and p2 in self.bound_to
 
-    def check(self) -> bool:
-        return self.sum == self.target if self.target else True
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.DISTINCT, tuple(sorted(pos_to_index(pos) for pos in self.bound_to)), self.target)]
+
+    def propagate(self, candidates: list[int]) -> bool:
+        if not self.target:
+            return True
+
+        cells = [pos_to_index(pos) for pos in self.bound_to]
+        fixed = union = 0
+        for i in cells:
+            c = candidates[i]
+            union |= c
+            if not c & (c - 1):
+                fixed |= c
+
+        # Keep the digits of every combination that holds the solved digits and fits the tiles
+        allowed = 0
+        for combo in CAGE_COMBINATIONS[len(cells)][self.target] if self.target < 46 else ():
+            if combo & fixed == fixed and combo & union == combo and all(candidates[i] & combo for i in cells):
+                allowed |= combo
+
+        for i in cells:
+            candidates[i] &= allowed
+            if not candidates[i]:
+                return False
+        return True
 
     def get_properties(self) -> list[Properties]:
         return [
@@ -59,9 +156,9 @@ class KillerRule(ComponentRule):
         if n_tiles < 1 or n_tiles > 9:
             raise PropertiesError("Number of cage tiles must be in range [1, 9].")
 
-        mn, mx = sum(i for i in range(1, n_tiles + 1)), sum(9 - i for i in range(n_tiles))
-        if (target_sum < mn or target_sum > mx) and target_sum != 0:
-            raise PropertiesError(f"Target sum must be either in range [{mn}, {mx}] or 0.")
+        if target_sum != 0 and not (0 < target_sum < 46 and CAGE_COMBINATIONS[n_tiles][target_sum]):
+            sums = [total for total, combos in enumerate(CAGE_COMBINATIONS[n_tiles]) if combos]
+            raise PropertiesError(f"Target sum must be either in range [{sums[0]}, {sums[-1]}] or 0.")
 
         dx, dy = (0, 1, 0, -1), (1, 0, -1, 0)
         for x, y in bound_to:
@@ -76,10 +173,25 @@ class KillerRule(ComponentRule):
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         top_left = min(self.bound_to, key=lambda x: x[0])[0], min(self.bound_to, key=lambda x: x[1])[1]
         ptop_left = top_left[0] * tile_size[0], top_left[1] * tile_size[1]
+
+        # Cages are drawn again on every rule redraw, so each shape is only composed once
+        key = frozenset(self.bound_to), self.target, tuple(tile_size), KillerRule.__mesh_key
+        images = KillerRule.__cage_images
+        image = images.get(key)
+        if image is None:
+            image = images[key] = self.__compose(top_left, tile_size)
+            if len(images) > KillerRule.CAGE_IMAGE_LIMIT:
+                images.popitem(last=False)
+        else:
+            images.move_to_end(key)
+        surface.blit(image, ptop_left)
+
+    def __compose(self, top_left: tuple[int, int], tile_size: tuple[float, float]) -> Surface:
         width = max(self.bound_to, key=lambda x: x[0])[0] - top_left[0] + 1
         height = max(self.bound_to, key=lambda x: x[1])[1] - top_left[1] + 1
+        image = Surface((width * tile_size[0], height * tile_size[1]), SRCALPHA)
 
-        mesh_grid = KillerMeshGrid((width << 1, height << 1))
+        bit_pos = set()
         for x, y in self.bound_to:
             conditions = (
                 (x + 1, y) in self.bound_to,
@@ -90,22 +202,30 @@ class KillerRule(ComponentRule):
             y -= top_left[1]
             states_pos = ((x + 1 << 1, (y << 1) + 1), ((x << 1) + 1, y + 1 << 1), (x + 1 << 1, y + 1 << 1))
 
-            mesh_grid.add(1, {states_pos[_] for _ in range(3) if conditions[_]} | {((x << 1) + 1, (y << 1) + 1)})
+            bit_pos |= {states_pos[_] for _ in range(3) if conditions[_]} | {((x << 1) + 1, (y << 1) + 1)}
+
+        # Each bit belongs to a single tile, so the whole cage goes in at once
+        mesh_grid = KillerMeshGrid((width << 1, height << 1))
+        mesh_grid.add(1, bit_pos)
 
         killer_tile_size = tile_size[0] / 2, tile_size[1] / 2
-        surface.blits(tuple((
-            smoothscale(KillerRule.killer_sprites[mesh_grid.states[y][x]], killer_tile_size),
-            (x * killer_tile_size[0] + ptop_left[0], y * killer_tile_size[1] + ptop_left[1])
-        ) for y in range(mesh_grid.state_h) for x in range(mesh_grid.state_w)))
+        sprites = KillerRule.get_scaled_mesh(killer_tile_size)
+        # State 0 (no cage tile around) is blank
+        ys, xs = mesh_grid.states.nonzero()
+        image.blits(tuple((
+            sprites[state],
+            (x * killer_tile_size[0], y * killer_tile_size[1])
+        ) for x, y, state in zip(xs.tolist(), ys.tolist(), mesh_grid.states[ys, xs].tolist())))
 
         if self.target:
             sum_tile = min(self.bound_to)
             text = KillerRule.font.render(str(self.target), True, KillerRule.color)
             # text = smoothscale(text, (text.get_width() * Tile.SIZE / 64, text.get_height() * Tile.SIZE / 64))
-            surface.blit(text, (
-                (sum_tile[0] + 0.125) * tile_size[0],
-                (sum_tile[1] + 0.125) * tile_size[1]
+            image.blit(text, (
+                (sum_tile[0] - top_left[0] + 0.125) * tile_size[0],
+                (sum_tile[1] - top_left[1] + 0.125) * tile_size[1]
             ))
+        return image
 
     @staticmethod
     def generate_killer_mesh(
@@ -116,6 +236,36 @@ class KillerRule(ComponentRule):
             color: tuple[int, int, int] = (255, 255, 255),
             stroke_weight: int = 2
     ):
+        """Makes the 16 marching squares sprites of the given size and style the ones cages are drawn with.
+        Sprites are only generated the first time a size and style is asked for."""
+        key = tuple(tile_render_size), weight, dash_len, gap_len, tuple(color), stroke_weight
+        KillerRule.__mesh_key = key
+        if key not in KillerRule.__meshes:
+            KillerRule.__meshes[key] = KillerRule.__generate_killer_mesh(*key)
+        KillerRule.killer_sprites = KillerRule.__meshes[key]
+
+    @staticmethod
+    def get_scaled_mesh(size: tuple[float, float]) -> tuple[Surface, ...]:
+        """The current sprites, by state, scaled to size once and kept for every later draw."""
+        size = int(size[0]), int(size[1])
+        key = size, KillerRule.__mesh_key
+        sprites = KillerRule.__scaled_meshes.get(key)
+        if sprites is None:
+            sprites = KillerRule.__scaled_meshes[key] = tuple(
+                smoothscale(KillerRule.killer_sprites[state], size) for state in range(16)
+            )
+        return sprites
+
+    @staticmethod
+    def __generate_killer_mesh(
+            tile_render_size: tuple[float, float],
+            weight: float,
+            dash_len: float,
+            gap_len: float,
+            color: tuple[int, int, int],
+            stroke_weight: int
+    ) -> dict[int, Surface]:
+        killer_sprites = {}
         w = np.clip(weight, 0.01, 1.0)
         bw, bh = (tile_render_size[0] * (1 - w)) / 2, (tile_render_size[1] * (1 - w)) / 2
         btl, btr, bbr, bbl = (bw, bh), \
@@ -123,22 +273,22 @@ class KillerRule(ComponentRule):
                              (tile_render_size[0] - bw, tile_render_size[1] - bh), \
                              (bw, tile_render_size[1] - bh)
 
-        KillerRule.killer_sprites[0] = Surface(tile_render_size, SRCALPHA)
-        KillerRule.killer_sprites[5] = Surface(tile_render_size, SRCALPHA)
-        KillerRule.killer_sprites[10] = Surface(tile_render_size, SRCALPHA)
-        KillerRule.killer_sprites[15] = Surface(tile_render_size, SRCALPHA)
+        killer_sprites[0] = Surface(tile_render_size, SRCALPHA)
+        killer_sprites[5] = Surface(tile_render_size, SRCALPHA)
+        killer_sprites[10] = Surface(tile_render_size, SRCALPHA)
+        killer_sprites[15] = Surface(tile_render_size, SRCALPHA)
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (btr[0], 0), bbr, (0, bbl[1])
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[1] = surface
+        killer_sprites[1] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (tile_render_size[0], bbr[1]), bbl, (btl[0], 0)
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[2] = surface
+        killer_sprites[2] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_line(
@@ -147,13 +297,13 @@ class KillerRule(ComponentRule):
             dash_len, gap_len,
             stroke_weight, color
         )
-        KillerRule.killer_sprites[3] = surface
+        killer_sprites[3] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (bbl[0], tile_render_size[1]), btl, (tile_render_size[0], btr[1])
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[4] = surface
+        killer_sprites[4] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_line(
@@ -162,19 +312,19 @@ class KillerRule(ComponentRule):
             dash_len, gap_len,
             stroke_weight, color
         )
-        KillerRule.killer_sprites[6] = surface
+        killer_sprites[6] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (bbl[0], tile_render_size[1]), bbl, (0, bbl[1])
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[7] = surface
+        killer_sprites[7] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (0, btl[1]), btr, (bbr[0], tile_render_size[1])
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[8] = surface
+        killer_sprites[8] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_line(
@@ -183,13 +333,13 @@ class KillerRule(ComponentRule):
             dash_len, gap_len,
             stroke_weight, color
         )
-        KillerRule.killer_sprites[9] = surface
+        killer_sprites[9] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (tile_render_size[0], bbr[1]), bbr, (bbr[0], tile_render_size[1])
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[11] = surface
+        killer_sprites[11] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_line(
@@ -198,37 +348,21 @@ class KillerRule(ComponentRule):
             dash_len, gap_len,
             stroke_weight, color
         )
-        KillerRule.killer_sprites[12] = surface
+        killer_sprites[12] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (btr[0], 0), btr, (tile_render_size[0], btr[1])
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[13] = surface
+        killer_sprites[13] = surface
 
         surface = Surface(tile_render_size, SRCALPHA)
         Graphics.dashed_lines(surface, [
             (0, btl[1]), btl, (btl[0], 0)
         ], dash_len, gap_len, stroke_weight, color)
-        KillerRule.killer_sprites[14] = surface
+        killer_sprites[14] = surface
+        return killer_sprites
 
 
 class KillerMeshGrid(MeshGrid):
-
-    @cache
-    def bit_to_state(self, bx, by) -> set[tuple[int, int]]:
-        conditions = (
-            bx > 0 and by > 0,
-            by > 0 and bx < self.bit_w - 1,
-            bx > 0 and by < self.bit_h - 1,
-            bx < self.bit_w - 1 and by < self.bit_h
-        )
-        states_pos = ((bx - 1, by - 1), (bx, by - 1), (bx - 1, by), (bx, by))
-
-        return {states_pos[_] for _ in range(4) if conditions[_]}
-
-    def update_state(self, sx, sy):
-        self._states[sy][sx] = (1 if self.bits[sy][sx] > 0 else 0) | \
-                               ((1 if self.bits[sy][sx + 1] > 0 else 0) << 1) | \
-                               ((1 if self.bits[sy + 1][sx + 1] > 0 else 0) << 2) | \
-                               ((1 if self.bits[sy + 1][sx] > 0 else 0) << 3)
+    pass
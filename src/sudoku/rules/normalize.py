@@ -0,0 +1,57 @@
+from .compiled import Constraint
+from .rule import Rule, GlobalRule, ComponentRule
+
+# Constraints that hold whichever order their tiles are listed in
+UNORDERED_CONSTRAINTS = {
+    Constraint.DISTINCT, Constraint.RATIO, Constraint.DIFFERENCE, Constraint.DIGITS, Constraint.CONTAINS
+}
+
+
+def constraint_key(constraint: tuple) -> tuple:
+    """The same constraint written the same way, e.g. a dot placed from either of its tiles."""
+    constraint_type, cells, param = constraint
+    if constraint_type in UNORDERED_CONSTRAINTS:
+        cells = tuple(sorted(cells))
+    elif constraint_type is Constraint.PALINDROME:
+        cells = min(cells, cells[::-1])
+    return constraint_type, cells, param
+
+
+def normalize(rules: set[Rule], preferred: set[Rule] = frozenset()) -> set[Rule]:
+    """
+    The rules worth evaluating: those adding something the others don't already enforce.
+    A global rule is dropped when the kept ones already make all its peers conflict (e.g. RowRule next to SudokuRule),
+    a component rule when its constraints are already kept (e.g. identical cages, two dots on the same tiles),
+    or when it only keeps tiles that are global peers apart (e.g. a cage without a sum inside a box).
+    preferred: Rules kept over their duplicates, so evaluating ones stay evaluated as rules come and go.
+    """
+    active = set()
+
+    # Widest global rules first, so they take over the ones they contain
+    global_rules = sorted(
+        (rule for rule in rules if isinstance(rule, GlobalRule)),
+        key=lambda rule: (rule not in preferred, -sum(mask.bit_count() for mask in rule.peer_masks()))
+    )
+    peers = [0] * 81
+    for rule in global_rules:
+        masks = rule.peer_masks()
+        if any(mask & ~peers[i] for i, mask in enumerate(masks)):
+            active.add(rule)
+            for i, mask in enumerate(masks):
+                peers[i] |= mask
+
+    kept = set()
+    for rule in sorted((rule for rule in rules if isinstance(rule, ComponentRule)), key=lambda rule: rule not in preferred):
+        keys = {constraint_key(constraint) for constraint in rule.constraints()}
+        if keys and all(key in kept or _is_peer_group(key, peers) for key in keys):
+            continue
+        active.add(rule)
+        kept |= keys
+    return active
+
+
+def _is_peer_group(key: tuple, peers: list[int]) -> bool:
+    constraint_type, cells, param = key
+    return constraint_type is Constraint.DISTINCT and not param and all(
+        peers[i] >> j & 1 for i in cells for j in cells if i != j
+    )
@@ -1,8 +1,7 @@
 from pygame import Surface
 
-import numpy as np
-
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index
+from .compiled import Constraint
 from core.gfx.graphics import Graphics
 from maker.properties import Properties, PropertiesType, PropertiesError
 
@@ -19,17 +18,45 @@ class PalindromeRule(ComponentRule):
             self.bound_to = [(0, 0), (1, 0)]
 
         self.length = len(self.bound_to)
-        self.values = [0 for _ in np.arange(self.length)]
+        self.reset()
+
+    def reset(self):
+        self.values = [0] * self.length
+        self.filled = 0
+        # Mirrored pairs that are filled with the same digit
+        self.matched = 0
+        self.satisfied = False
+        self.violations = set()
 
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         index = self.bound_to.index(pos)
+        mirror = self.length - 1 - index
+        if mirror != index:
+            self.matched -= self.values[index] == self.values[mirror] != 0
+            self.matched += new_val == self.values[mirror] != 0
+        self.filled += bool(new_val) - bool(self.values[index])
         self.values[index] = new_val
+
+        self.satisfied = self.filled == self.length and self.matched == self.length >> 1
+        if mirror != index:
+            pair = {pos, self.bound_to[mirror]}
+            if new_val and self.values[mirror] and new_val != self.values[mirror]:
+                self.violations = self.violations | pair
+            elif self.violations & pair:
+                self.violations = self.violations - pair
         print(f"[Palindrome Rule]: Current values = {self.values}.")
 
-    def check(self) -> bool:
-        if 0 in self.values:
-            return False
-        return all(self.values[i] == self.values[-1 - i] for i in np.arange(self.length >> 1))
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.PALINDROME, tuple(pos_to_index(pos) for pos in self.bound_to), 0)]
+
+    def propagate(self, candidates: list[int]) -> bool:
+        for i in range(len(self.bound_to) >> 1):
+            a, b = pos_to_index(self.bound_to[i]), pos_to_index(self.bound_to[-1 - i])
+            c = candidates[a] & candidates[b]
+            if not c:
+                return False
+            candidates[a] = candidates[b] = c
+        return True
 
     def get_properties(self) -> list[Properties]:
         return [
@@ -60,7 +87,6 @@ class PalindromeRule(ComponentRule):
 
         self.bound_to = bound_to
         self.length = len(self.bound_to)
-        self.values = [0 for _ in np.arange(self.length)]
 
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         Graphics.smooth_lines(surface, [
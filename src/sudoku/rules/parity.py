@@ -1,27 +1,44 @@
 from pygame import Surface
 from pygame.gfxdraw import filled_circle
 
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index
+from .compiled import Constraint
 from core.gfx.graphics import Graphics
 from maker.properties import Properties, PropertiesType, PropertiesError
 
 
 # ----- Data -----
 class ParityRule(ComponentRule):
+    digits = 0
 
     def __init__(self, tile: tuple[int, int] = (0, 0)):
         super().__init__([tile])
-        self.value = 0
+        self.reset()
 
     def __new__(cls, *args, **kwargs):
         if cls is ParityRule:
             raise TypeError(f"Only childrens of {cls.__name__} shall be instantiated!")
         return super().__new__(cls)
 
+    def reset(self):
+        self.value = 0
+        self.satisfied = False
+        self.violations = set()
+
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         self.value = new_val
+        self.satisfied = bool(new_val) and bool(self.digits >> (new_val - 1) & 1)
+        self.violations = {pos} if new_val and not self.satisfied else set()
         print(f"[Parity Rule]: Current value = {self.value}.")
 
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.DIGITS, (pos_to_index(self.bound_to[0]),), self.digits)]
+
+    def propagate(self, candidates: list[int]) -> bool:
+        i = pos_to_index(self.bound_to[0])
+        candidates[i] &= self.digits
+        return bool(candidates[i])
+
     def get_properties(self) -> list[Properties]:
         return [
             Properties("Tile", PropertiesType.POS, self.bound_to[0])
@@ -41,12 +58,11 @@ class ParityRule(ComponentRule):
 class EvenRule(ParityRule):
     DESCRIPTIONS = "Grey squares show even digits."
 
+    digits = 0b010101010
+
     weight = .75
     color = (150, 150, 150)
 
-    def check(self) -> bool:
-        return self.value and self.value % 2 == 0
-
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         bw = tile_size[0] * (1 - EvenRule.weight) / 2
         Graphics.rect(
@@ -60,12 +76,11 @@ class EvenRule(ParityRule):
 class OddRule(ParityRule):
     DESCRIPTIONS = "Grey circles show odd digits."
 
+    digits = 0b101010101
+
     weight = .75
     color = (150, 150, 150)
 
-    def check(self) -> bool:
-        return self.value % 2 != 0
-
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         filled_circle(
             surface,
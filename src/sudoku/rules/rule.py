@@ -4,7 +4,43 @@ from maker.properties import Properties
 from core.event import Event
 
 
+POSITIONS = tuple((x, y) for y in range(9) for x in range(9))
+ALL_DIGITS = 0x1FF
+
+
+def pos_to_index(pos: tuple[int, int]) -> int:
+    return pos[1] * 9 + pos[0]
+
+
+def mask_to_positions(mask: int):
+    """Yields the positions of the set bits of a 81-bit position mask."""
+    while mask:
+        low = mask & -mask
+        yield POSITIONS[low.bit_length() - 1]
+        mask ^= low
+
+
+def digit_range(lo: int, hi: int) -> int:
+    """Candidate bitmask (bit d - 1 for digit d) of the digits from lo to hi."""
+    lo, hi = max(lo, 1), min(hi, 9)
+    return ((1 << hi) - 1) & ~((1 << (lo - 1)) - 1) if lo <= hi else 0
+
+
+def min_digit(mask: int) -> int:
+    return (mask & -mask).bit_length()
+
+
+def max_digit(mask: int) -> int:
+    return mask.bit_length()
+
+
 class Rule:
+    # Kept up-to-date by update, so that checking a rule is O(1)
+    satisfied = True
+
+    def reset(self):
+        """Forgets every value this rule has been updated with."""
+        pass
 
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         pass
@@ -14,7 +50,7 @@ class Rule:
         return False
 
     def check(self) -> bool:
-        return True
+        return self.satisfied
 
 
 class RuleManager:
@@ -24,125 +60,287 @@ class RuleManager:
         self.component_rules = set()
         self.global_rules = set()
         self.pos_to_comp_map: dict[tuple, set] = {}
+        # The tiles each active component rule is found under in pos_to_comp_map
+        self.__mapped_tiles: dict[Rule, frozenset] = {}
+        self.peer_masks: list[int] = [0] * 81
+        self.__compiled = None
 
         self.rules: set[Rule] = set()
-        if rules:
-            self.add_rule(rules)
+        # The rules actually evaluated. The others are redundant, and only kept for display
+        self.active_rules: set[Rule] = set()
+        self.redundant_rules: set[Rule] = set()
+        # Component rules the current values don't satisfy yet
+        self.unsatisfied: set[Rule] = set()
 
         self.conflicts: dict[tuple, set] = {}
+        # How many component rules each tile breaks
+        self.violations: dict[tuple, int] = {}
         self.old_conflicts: set = set()
         self.value_to_tile_map: dict[int, set] = {}
+        self.value_to_mask: dict[int, int] = {}
 
         # Events
         self.on_rule_added = Event()
         self.on_rule_removed = Event()
+        self.on_rule_refreshed = Event()
         self.on_conflict_changed = Event()
 
+        if rules:
+            self.add_rule(rules)
+
     def add_rule(self, rules: set[Rule] | Rule):
         rules = rules if type(rules) is set else {rules}
 
         for rule in rules:
             if isinstance(rule, ComponentRule):
                 self.component_rules.add(rule)
-
-                for pos in rule.bound_to:
-                    if not self.pos_to_comp_map.get(pos):
-                        self.pos_to_comp_map[pos] = set()
-                    self.pos_to_comp_map[pos].add(rule)
-
             elif isinstance(rule, GlobalRule):
                 self.global_rules.add(rule)
 
         self.rules = self.component_rules | self.global_rules
+        self.normalize()
         self.on_rule_added()
 
     def remove_rule(self, rules: set[Rule] | Rule):
         rules = rules if type(rules) is set else {rules}
-        for rule in rules:
-            if rule not in self.rules:
-                continue
+        self.component_rules -= rules
+        self.global_rules -= rules
+        self.rules = self.component_rules | self.global_rules
+        self.normalize()
+        self.on_rule_removed()
 
+    def normalize(self):
+        """Picks the rules to evaluate again after rules were added or removed.
+        Rules whose constraints are already enforced by the others are left out of every update."""
+        # Rule modules import the constraint codes, so the normalizer can only be imported once they're loaded
+        from .normalize import normalize
+        active = normalize(self.rules, self.active_rules)
+
+        for rule in self.active_rules - active:
             if isinstance(rule, ComponentRule):
-                self.component_rules.remove(rule)
+                self.unsatisfied.discard(rule)
+                self._move_violations(rule.violations, set())
+                self.__unmap(rule)
 
+        for rule in active - self.active_rules:
+            if isinstance(rule, ComponentRule):
+                # Redundant rules aren't updated, so they catch up with the values entered meanwhile
+                rule.reset()
                 for pos in rule.bound_to:
-                    self.pos_to_comp_map[pos].remove(rule)
-                    if not len(self.pos_to_comp_map[pos]):
-                        self.pos_to_comp_map.pop(pos)
-
-            elif isinstance(rule, GlobalRule):
-                self.global_rules.remove(rule)
-
-            self.rules.remove(rule)
-        self.on_rule_removed()
+                    if value := self.value_at(pos):
+                        rule.update(pos, value, 0)
+                if not rule.check():
+                    self.unsatisfied.add(rule)
+                self._move_violations(set(), rule.violations)
+                self.__map(rule)
+
+        self.__set_active(active)
+
+    def refresh(self, rule: Rule):
+        """Evaluates every rule again from the current values after rule's properties were edited in place,
+        e.g. from the maker's properties panel. Its old tiles, conflicts and violations can't be told apart anymore."""
+        from .normalize import normalize
+        values = {pos: value for value, tiles in self.value_to_tile_map.items() for pos in tiles}
+
+        self.pos_to_comp_map = {}
+        self.__mapped_tiles = {}
+        active = normalize(self.rules, self.active_rules - {rule})
+        for rule_ in active:
+            if isinstance(rule_, ComponentRule):
+                self.__map(rule_)
+        self.__set_active(active)
+        self.load_values(values)
+        self.on_rule_refreshed()
+
+    def __map(self, rule: "ComponentRule"):
+        # Remembered, so the rule can be unmapped even after its tiles were edited
+        self.__mapped_tiles[rule] = tiles = frozenset(rule.bound_to)
+        for pos in tiles:
+            if not self.pos_to_comp_map.get(pos):
+                self.pos_to_comp_map[pos] = set()
+            self.pos_to_comp_map[pos].add(rule)
+
+    def __unmap(self, rule: "ComponentRule"):
+        for pos in self.__mapped_tiles.pop(rule):
+            self.pos_to_comp_map[pos].remove(rule)
+            if not len(self.pos_to_comp_map[pos]):
+                self.pos_to_comp_map.pop(pos)
+
+    def __set_active(self, active: set[Rule]):
+        redundant = self.rules - active
+        changed = redundant != self.redundant_rules
+        self.active_rules = active
+        self.redundant_rules = redundant
+        self._compile_peers()
+
+        if redundant and changed:
+            component_rules = [rule for rule in self.rules if isinstance(rule, ComponentRule)]
+            saved = sum(len(rule.bound_to) for rule in component_rules if rule in self.redundant_rules)
+            print(f"[Rule Manager]: Skipping {len(self.redundant_rules)} redundant rule(s) of {len(self.rules)}, "
+                  f"saving {saved} of {sum(len(rule.bound_to) for rule in component_rules)} rule updates "
+                  f"and {len(self.global_rules - active)} of {len(self.global_rules)} peer tables per grid")
+
+    def value_at(self, pos: tuple[int, int]) -> int:
+        bit = 1 << pos_to_index(pos)
+        for value, mask in self.value_to_mask.items():
+            if mask & bit:
+                return value
+        return 0
 
     def clear_rule(self):
         self.rules = set()
+        self.active_rules = set()
+        self.redundant_rules = set()
         self.component_rules = set()
         self.global_rules = set()
+        self.unsatisfied = set()
         self.pos_to_comp_map: dict[tuple, set] = {}
+        self.__mapped_tiles = {}
+        self.peer_masks = [0] * 81
+        self.__compiled = None
         self.conflicts: dict[tuple, set] = {}
+        self.violations: dict[tuple, int] = {}
         self.value_to_tile_map: dict[int, set] = {}
+        self.value_to_mask: dict[int, int] = {}
+
+    def compile(self):
+        """The active ruleset flattened into a CompiledRuleset, rebuilt only after the rules change."""
+        if self.__compiled is None:
+            # Rule modules import the constraint codes, so the compiler can only be imported once they're loaded
+            from .compiled import CompiledRuleset
+            self.__compiled = CompiledRuleset(self.active_rules)
+        return self.__compiled
+
+    def _compile_peers(self):
+        """Merges the peer tables of the active global rules into one conflict bitmask per position."""
+        self.__compiled = None
+        self.peer_masks = [0] * 81
+        for rule in self.global_rules & self.active_rules:
+            for index, mask in enumerate(rule.peer_masks()):
+                self.peer_masks[index] |= mask
 
     def update(self, new_val: int, old_values: dict[tuple[int, int], int]):
+        self.update_many({pos: 0 if new_val == old_val else new_val for pos, old_val in old_values.items()}, old_values)
+
+    def update_many(self, new_values: dict[tuple[int, int], int], old_values: dict[tuple[int, int], int]):
+        """Applies a batch of value changes and reports the resulting conflict changes once."""
         for pos, old_val in old_values.items():
-            tmp_new = 0 if new_val == old_val else new_val
+            new_val = new_values[pos]
+            if new_val == old_val:
+                continue
+
+            index = pos_to_index(pos)
 
             if old_val:
                 self.value_to_tile_map[old_val].remove(pos)
+                self.value_to_mask[old_val] &= ~(1 << index)
+                self._remove_conflicts(pos)
 
-            for rule in self.rules:
-                self._update_conflict(pos, tmp_new, old_val, rule)
+            if new_val:
+                for valpos in mask_to_positions(self.peer_masks[index] & self.value_to_mask.get(new_val, 0)):
+                    self._add_conflict(pos, valpos)
+
+                for rule in self.pos_to_comp_map.get(pos, ()):
+                    for valpos in self.value_to_tile_map.get(new_val, ()):
+                        if rule.conflict(valpos, pos):
+                            self._add_conflict(pos, valpos)
 
-            if tmp_new:
                 if not self.value_to_tile_map.get(new_val):
                     self.value_to_tile_map[new_val] = set()
-                self.value_to_tile_map[tmp_new].add(pos)
+                self.value_to_tile_map[new_val].add(pos)
+                self.value_to_mask[new_val] = self.value_to_mask.get(new_val, 0) | 1 << index
 
             if self.pos_to_comp_map.get(pos):
                 for rule in self.pos_to_comp_map[pos]:
-                    rule.update(pos, tmp_new, old_val)
-
-        new_conflicts = set(self.conflicts)
+                    old_violations = rule.violations
+                    rule.update(pos, new_val, old_val)
+                    if rule.violations is not old_violations:
+                        self._move_violations(old_violations, rule.violations)
+                    if rule.check():
+                        self.unsatisfied.discard(rule)
+                    else:
+                        self.unsatisfied.add(rule)
+
+        new_conflicts = self.conflicting_tiles()
         if self.old_conflicts != new_conflicts:
             print(f"[Rule Manager]: Conflicts = {self.conflicts}")
             self.on_conflict_changed(old_conflicts=self.old_conflicts, conflicts=new_conflicts)
         self.old_conflicts = new_conflicts
 
-    def _update_conflict(self, pos: tuple[int, int], new_val: int, old_val: int, rule: Rule):
-        if old_val:
-            if self.conflicts.get(pos):
-                for conflict in self.conflicts.get(pos):
-                    self.conflicts[conflict].remove(pos)
-
-                    if not len(self.conflicts[conflict]):
-                        self.conflicts.pop(conflict)
-
-                self.conflicts.pop(pos)
-
-        if new_val:
-            if not self.value_to_tile_map.get(new_val):
-                self.value_to_tile_map[new_val] = set()
-
-            for valpos in self.value_to_tile_map[new_val]:
-                if rule.conflict(valpos, pos):
-                    if not self.conflicts.get(pos):
-                        self.conflicts[pos] = set()
-                    if not self.conflicts.get(valpos):
-                        self.conflicts[valpos] = set()
-
-                    self.conflicts[pos].add(valpos)
-                    self.conflicts[valpos].add(pos)
+    def conflicting_tiles(self) -> set[tuple[int, int]]:
+        """Tiles that clash with another tile or already break a component rule."""
+        return set(self.conflicts) | self.violations.keys()
+
+    def _move_violations(self, old_violations: set[tuple[int, int]], new_violations: set[tuple[int, int]]):
+        for pos in old_violations - new_violations:
+            self.violations[pos] -= 1
+            if not self.violations[pos]:
+                self.violations.pop(pos)
+        for pos in new_violations - old_violations:
+            self.violations[pos] = self.violations.get(pos, 0) + 1
+
+    def _remove_conflicts(self, pos: tuple[int, int]):
+        if self.conflicts.get(pos):
+            for conflict in self.conflicts.get(pos):
+                self.conflicts[conflict].remove(pos)
+
+                if not len(self.conflicts[conflict]):
+                    self.conflicts.pop(conflict)
+
+            self.conflicts.pop(pos)
+
+    def _add_conflict(self, p1: tuple[int, int], p2: tuple[int, int]):
+        if not self.conflicts.get(p1):
+            self.conflicts[p1] = set()
+        if not self.conflicts.get(p2):
+            self.conflicts[p2] = set()
+
+        self.conflicts[p1].add(p2)
+        self.conflicts[p2].add(p1)
+
+    def load_values(self, values: dict[tuple[int, int], int]):
+        """Rebuilds value and conflict state from scratch for a whole grid."""
+        self.conflicts = {}
+        self.violations = {}
+        self.value_to_tile_map = {}
+        self.value_to_mask = {}
+        for rule in self.component_rules & self.active_rules:
+            rule.reset()
+        self.unsatisfied = {rule for rule in self.component_rules & self.active_rules if not rule.check()}
+
+        self.update_many(values, {pos: 0 for pos in values})
 
     def check(self) -> bool:
-        return len(self.conflicts) == 0 and all(map(lambda rule: rule.check(), self.component_rules))
+        return len(self.conflicts) == 0 and len(self.unsatisfied) == 0
 
 
 class GlobalRule(Rule):
-    pass
+    __peer_masks: dict[type, tuple[int, ...]] = {}
+
+    def houses(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        """Groups of 9 positions that must each contain every digit exactly once.
+        Rules that cannot be described this way return an empty tuple."""
+        return ()
+
+    def peer_masks(self) -> tuple[int, ...]:
+        """Precompiled conflict table of this rule, indexed by y * 9 + x.
+        Bit (y2 * 9 + x2) of an entry is set when both positions conflict.
+        Global rules hold no per-instance state, so the table is compiled once per rule type."""
+        masks = GlobalRule.__peer_masks.get(type(self))
+        if masks is None:
+            masks = tuple(
+                sum(1 << i for i, p2 in enumerate(POSITIONS) if p1 != p2 and self.conflict(p1, p2))
+                for p1 in POSITIONS
+            )
+            GlobalRule.__peer_masks[type(self)] = masks
+        return masks
 
 
 class ComponentRule(Rule):
+    """A rule bound to specific tiles. Its conflicts are only looked up for changes inside bound_to."""
+
+    # Tiles whose values already break this rule. Replaced, never mutated, on every update
+    violations: set[tuple[int, int]] = frozenset()
 
     def __init__(self, bound_to):
         self.bound_to = bound_to
@@ -150,8 +348,18 @@ class ComponentRule(Rule):
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         pass
 
+    def constraints(self) -> list[tuple]:
+        """This rule as (Constraint, tile indices, parameter) tuples for CompiledRuleset."""
+        return []
+
+    def propagate(self, candidates: list[int]) -> bool:
+        """Narrows the candidate bitmasks of the bound tiles (indexed y * 9 + x, bit d - 1 for digit d).
+        Returns False once the rule can no longer be satisfied."""
+        return True
+
     def get_properties(self) -> list[Properties]:
         return []
 
     def set_properties(self, *data):
+        """Only changes what the rule is. The RuleManager holding it evaluates it again with refresh."""
         pass
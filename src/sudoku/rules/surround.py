@@ -2,7 +2,8 @@ from pygame import Surface
 from pygame.font import SysFont
 from pygame.gfxdraw import filled_circle
 
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index
+from .compiled import Constraint
 from maker.properties import Properties, PropertiesType, PropertiesError
 
 
@@ -22,7 +23,7 @@ class SurroundRule(ComponentRule):
             (tile[0], tile[1] + 1), (tile[0] + 1, tile[1] + 1)
         ])
         self.target = values or {1, 2, 3, 4}
-        self.values = list()
+        self.reset()
 
         # For drawing
         self.pos = (tile[0] + 1, tile[1] + 1)
@@ -54,17 +55,45 @@ class SurroundRule(ComponentRule):
         self.pos = self.bound_to[-1]
         self.target = values
 
+    def reset(self):
+        self.values = list()
+        self.filled = set()
+        self.satisfied = False
+        self.violations = set()
+
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         if old_val:
             self.values.remove(old_val)
         if new_val:
             self.values.append(new_val)
+        if new_val:
+            self.filled.add(pos)
+        else:
+            self.filled.discard(pos)
+        self.__update_satisfied()
         print(f"[Surround Rule]: Current values = {self.values}, target values = {self.target}.")
 
-    def check(self) -> bool:
-        if len(self.values) < 4:
-            return False
-        return set(self.values) & self.target == self.target
+    def __update_satisfied(self):
+        # At most 4 values against at most 4 targets
+        self.satisfied = len(self.values) == 4 and all(value in self.values for value in self.target)
+
+        # Not enough empty tiles left for the missing values
+        missing = sum(value not in self.values for value in self.target)
+        self.violations = set(self.filled) if missing > 4 - len(self.values) else set()
+
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.CONTAINS, tuple(pos_to_index(pos) for pos in self.bound_to), sum(1 << (value - 1) for value in self.target))]
+
+    def propagate(self, candidates: list[int]) -> bool:
+        cells = [pos_to_index(pos) for pos in self.bound_to]
+        for value in self.target:
+            bit = 1 << (value - 1)
+            holders = [i for i in cells if candidates[i] & bit]
+            if not holders:
+                return False
+            if len(holders) == 1:
+                candidates[holders[0]] = bit
+        return True
 
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         pos = self.pos[0] * tile_size[0], self.pos[1] * tile_size[1]
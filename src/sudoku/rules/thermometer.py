@@ -1,8 +1,7 @@
 from pygame import Surface
 
-import numpy as np
-
-from .rule import ComponentRule
+from .rule import ComponentRule, pos_to_index, min_digit, max_digit
+from .compiled import Constraint
 from core.utils.constants import TWO_PI
 from core.gfx.graphics import Graphics
 from maker.properties import Properties, PropertiesType, PropertiesError
@@ -20,18 +19,73 @@ class ThermometerRule(ComponentRule):
             self.bound_to = [(0, 0), (1, 0)]
 
         self.length = len(self.bound_to)
-        self.values = [0 for _ in np.arange(self.length)]
+        self.reset()
+
+    def reset(self):
+        self.values = [0] * self.length
         self.error = 0
+        self.filled = 0
+        # Neighbouring pairs that are both filled and increasing
+        self.increasing = 0
+        self.satisfied = False
+        self.violations = set()
 
     def update(self, pos: tuple[int, int], new_val: int, old_val: int):
         index = self.bound_to.index(pos)
+        self.increasing -= self.__increasing_around(index)
+        self.filled += bool(new_val) - bool(self.values[index])
         self.values[index] = new_val
+        self.increasing += self.__increasing_around(index)
+
+        self.satisfied = self.filled == self.length and self.increasing == self.length - 1
+        self.violations = self.__find_violations()
         print(f"[Thermometer Rule]: Current values = {self.values}.")
 
-    def check(self) -> bool:
-        if 0 in self.values:
-            return False
-        return all(self.values[i - 1] < self.values[i] for i in np.arange(1, self.length))
+    def __find_violations(self) -> set[tuple[int, int]]:
+        """Tiles too small for what comes before them, or too large for what comes after them."""
+        violations = set()
+        low = 1
+        for pos, value in zip(self.bound_to, self.values):
+            if value and value < low:
+                violations.add(pos)
+            low = max(low, value) + 1
+
+        high = 9
+        for pos, value in zip(reversed(self.bound_to), reversed(self.values)):
+            if value and value > high:
+                violations.add(pos)
+            high = min(high, value or 10) - 1
+        return violations
+
+    def __increasing_around(self, index: int) -> int:
+        return sum(
+            0 < self.values[i - 1] < self.values[i]
+            for i in (index, index + 1) if 0 < i < self.length
+        )
+
+    def constraints(self) -> list[tuple]:
+        return [(Constraint.INCREASING, tuple(pos_to_index(pos) for pos in self.bound_to), 0)]
+
+    def propagate(self, candidates: list[int]) -> bool:
+        cells = [pos_to_index(pos) for pos in self.bound_to]
+
+        # Each tile must be greater than the smallest digit before it, and smaller than the largest after it
+        low = 0
+        for i in cells:
+            c = candidates[i] & ~((1 << low) - 1)
+            if not c:
+                return False
+            candidates[i] = c
+            low = min_digit(c)
+
+        high = 10
+        for i in reversed(cells):
+            c = candidates[i] & ((1 << (high - 1)) - 1)
+            if not c:
+                return False
+            candidates[i] = c
+            high = max_digit(c)
+        return True
 
     def get_properties(self) -> list[Properties]:
         return [
@@ -62,7 +116,6 @@ class ThermometerRule(ComponentRule):
 
         self.bound_to = bound_to
         self.length = len(self.bound_to)
-        self.values = [0 for _ in np.arange(self.length)]
 
     def draw(self, surface: Surface, tile_size: tuple[float, float]):
         org = (self.bound_to[0][0] + .5) * tile_size[0], (self.bound_to[0][1] + .5) * tile_size[1]
@@ -5,8 +5,6 @@ from pygame.transform import smoothscale
 
 import numpy as np
 
-from functools import cache
-
 from core.gfx.graphics import Graphics
 from core.utils.constants import HALF_PI, PI
 from core.utils.mesh import MeshGrid
@@ -34,6 +32,8 @@ class SelectionGrid(DirtySprite):
         self.mesh_grid = SelectionMeshGrid((20, 20))
         self.image = Surface(self.rect.size, SRCALPHA)
         self.__original_image = Surface((self.render_tlw * 20, self.render_tlh * 20), SRCALPHA)
+        # Mesh tiles redrawn since the last frame, rescaled into image once per frame by update
+        self.__dirty_tiles: set[tuple[int, int]] = set()
 
         # Properties
         self.selected = set()
@@ -49,12 +49,14 @@ class SelectionGrid(DirtySprite):
 
         self.dirty = 1
         self.image = smoothscale(self.__original_image, self.rect.size)
+        self.__dirty_tiles.clear()
 
     def clear(self):
         self.selected.clear()
         self.mesh_grid.reset()
         self.image.fill((0, 0, 0, 0))
         self.__original_image.fill((0, 0, 0, 0))
+        self.__dirty_tiles.clear()
         self.dirty = 1
 
     def is_selected(self, tlpos: tuple[int, int]) -> bool:
@@ -91,13 +93,30 @@ class SelectionGrid(DirtySprite):
         self.selected.remove(tlpos)
 
     def draw_tile(self, tlx, tly):
-        state = self.mesh_grid.states[tly][tlx]
+        state = self.mesh_grid.states[tly, tlx]
         pxpos = tlx * self.render_tlw, tly * self.render_tlh
 
-        self.dirty = 1
         self.__original_image.fill((0, 0, 0, 0), Rect(pxpos, self.render_tile_size))
         self.__original_image.blit(SelectionGrid.sprite_map[state], pxpos)
-        self.image = smoothscale(self.__original_image, self.rect.size)
+        self.__dirty_tiles.add((tlx, tly))
+
+    def update(self, *args, **kwargs):
+        """Rescales only the mesh tiles redrawn since the last frame, straight into image."""
+        if not self.__dirty_tiles:
+            return
+
+        w, h = self.rect.w / 20, self.rect.h / 20
+        for tlx, tly in self.__dirty_tiles:
+            left, top = round(tlx * w), round(tly * h)
+            rect = Rect(left, top, round((tlx + 1) * w) - left, round((tly + 1) * h) - top)
+            smoothscale(
+                self.__original_image.subsurface(Rect(
+                    (tlx * self.render_tlw, tly * self.render_tlh), self.render_tile_size
+                )),
+                rect.size, self.image.subsurface(rect)
+            )
+        self.__dirty_tiles.clear()
+        self.dirty = 1
 
     def generate_mesh_sprites(
         self,
@@ -383,21 +402,4 @@ class SelectionGrid(DirtySprite):
 
 
 class SelectionMeshGrid(MeshGrid):
-
-    @cache
-    def bit_to_state(self, bx, by) -> set[tuple[int, int]]:
-        conditions = (
-            bx > 0 and by > 0,
-            by > 0 and bx < self.bit_w - 1,
-            bx > 0 and by < self.bit_h - 1,
-            bx < self.bit_w - 1 and by < self.bit_h
-        )
-        states_pos = ((bx - 1, by - 1), (bx, by - 1), (bx - 1, by), (bx, by))
-
-        return {states_pos[_] for _ in range(4) if conditions[_]}
-
-    def update_state(self, sx, sy):
-        self._states[sy][sx] = (1 if self.bits[sy][sx] > 0 else 0) | \
-                               ((1 if self.bits[sy][sx + 1] > 0 else 0) << 1) | \
-                               ((1 if self.bits[sy + 1][sx + 1] > 0 else 0) << 2) | \
-                               ((1 if self.bits[sy + 1][sx] > 0 else 0) << 3)
+    pass
@@ -0,0 +1,83 @@
+import os
+import json
+from threading import Event, Lock
+
+import pygame as pg
+
+from core.worker import BackgroundWorker
+from .level import Level, parse_seed, format_seed
+from .solver import SolveStatus, count_solutions
+
+SOLVE_TIME_BUDGET = 30
+
+
+class SolutionCache:
+    """Unique solutions by level content hash. None marks levels without a unique solution.
+    Solutions are put from the solution service's thread, so every access holds the lock."""
+    __PATH = "data/solutions.json"
+    solutions: dict[str, str | None] = {}
+    __unsaved: dict[str, str | None] = {}
+    __lock = Lock()
+
+    @staticmethod
+    def load():
+        if os.path.exists(SolutionCache.__PATH):
+            with open(SolutionCache.__PATH, "r") as file, SolutionCache.__lock:
+                SolutionCache.solutions = json.load(file)
+
+    @staticmethod
+    def save():
+        with SolutionCache.__lock:
+            data = json.dumps(SolutionCache.solutions)
+        with open(SolutionCache.__PATH, "w") as file:
+            file.write(data)
+
+    @staticmethod
+    def contains(level_hash: str) -> bool:
+        with SolutionCache.__lock:
+            return level_hash in SolutionCache.solutions or level_hash in SolutionCache.__unsaved
+
+    @staticmethod
+    def get(level_hash: str) -> dict[tuple[int, int], int] | None:
+        with SolutionCache.__lock:
+            seed = SolutionCache.solutions.get(level_hash, SolutionCache.__unsaved.get(level_hash))
+        return parse_seed(seed) if seed else None
+
+    @staticmethod
+    def put(level_hash: str, solution: dict[tuple[int, int], int] | None, persist=True):
+        """persist: False for levels that won't come back, e.g. random ones, so they are only kept for this run"""
+        seed = format_seed(solution) if solution else None
+        with SolutionCache.__lock:
+            (SolutionCache.solutions if persist else SolutionCache.__unsaved)[level_hash] = seed
+
+
+class SolutionService:
+    """Solves levels on a background thread. Answers arrive as SOLUTION_READY events with `result` and `level_hash`."""
+
+    SOLUTION_READY = pg.event.custom_type()
+
+    def __init__(self):
+        self.worker = BackgroundWorker(SolutionService.SOLUTION_READY, "Solution Service")
+
+    def request(self, level: Level, level_hash: str, persist=True):
+        if SolutionCache.contains(level_hash):
+            self.worker.cancel()
+            pg.event.post(pg.event.Event(
+                SolutionService.SOLUTION_READY, result=SolutionCache.get(level_hash), level_hash=level_hash
+            ))
+            return
+
+        def job(cancel: Event):
+            result = count_solutions(level, 2, SOLVE_TIME_BUDGET, cancel)
+            print(f"[Solution Service]: {result}")
+
+            solution = result.solutions[0] if result.is_unique else None
+            # Timed out or cancelled runs may get further next time
+            if result.status in (SolveStatus.SOLVED, SolveStatus.NO_SOLUTION):
+                SolutionCache.put(level_hash, solution, persist)
+            return solution
+
+        self.worker.submit(job, level_hash=level_hash)
+
+    def cancel(self):
+        self.worker.cancel()
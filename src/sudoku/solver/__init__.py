@@ -0,0 +1,5 @@
+from .exact_cover import ExactCoverSolver, SolverError, solve
+from .propagation import PropagationSolver, SolveResult, SolveStatus, solve_level
+from .uniqueness import SolutionCount, count_solutions
+from .generator import Symmetry, generate, generate_puzzle, random_solution
+from .rater import LogicalSolver, Rating, Technique, rate_level, rate_directory
@@ -0,0 +1,132 @@
+from ..rules.rule import Rule, POSITIONS, ALL_DIGITS, pos_to_index
+from ..rules.compiled import CompiledRuleset
+
+
+class SolverError(Exception):
+    """Raised when a level uses rules that the solver cannot express."""
+    pass
+
+
+def exact_cover_houses(ruleset: set[Rule]) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """Collects the houses of a ruleset, making sure they describe every rule completely."""
+    compiled = CompiledRuleset(ruleset)
+    if not compiled.exact_cover:
+        raise SolverError("The ruleset cannot be expressed as an exact cover.")
+    return tuple(tuple(POSITIONS[i] for i in house) for house in compiled.houses)
+
+
+class ExactCoverSolver:
+    """
+    Exact cover solver for grids whose rules are all houses: every tile holds one digit,
+    every house holds each digit once. Candidates are kept as one bitmask per tile, and
+    placing a digit clears its bit from the tile's peers, recording them so backtracking only
+    restores what changed. Branches on a digit with a single place left in a house, or on the
+    tile with the fewest candidates otherwise.
+    """
+
+    __tables: dict[tuple, tuple] = {}
+
+    def __init__(self, houses: tuple[tuple[tuple[int, int], ...], ...]):
+        self.houses = houses
+
+        tables = ExactCoverSolver.__tables.get(houses)
+        if tables is None:
+            tables = ExactCoverSolver.__tables[houses] = ExactCoverSolver.__build(houses)
+        self.__house_tiles, self.__peers = tables
+
+    @classmethod
+    def from_ruleset(cls, ruleset: set[Rule]):
+        return cls(exact_cover_houses(ruleset))
+
+    @staticmethod
+    def __build(houses) -> tuple:
+        house_tiles = tuple(tuple(pos_to_index(pos) for pos in house) for house in houses)
+        peers = [set() for _ in range(81)]
+        for tiles in house_tiles:
+            for tile in tiles:
+                peers[tile].update(tiles)
+        return house_tiles, tuple(tuple(sorted(tile_peers - {tile})) for tile, tile_peers in enumerate(peers))
+
+    def solve(self, start_values: dict[tuple[int, int], int], limit=1) -> list[dict[tuple[int, int], int]]:
+        """Returns up to `limit` solutions of the grid, each as a dict of every position's value."""
+        house_tiles, peers = self.__house_tiles, self.__peers
+        candidates = [ALL_DIGITS] * 81
+        # The placed digit's bit, 0 while empty
+        placed = [0] * 81
+        trail = []
+
+        def place(tile: int, bit: int) -> bool:
+            """Places a digit and clears it from the peers, False if an empty peer runs out of candidates."""
+            placed[tile] = bit
+            for peer in peers[tile]:
+                peer_candidates = candidates[peer]
+                if peer_candidates & bit:
+                    if peer_candidates == bit and not placed[peer]:
+                        return False
+                    candidates[peer] = peer_candidates ^ bit
+                    trail.append(peer)
+            return True
+
+        for pos, value in start_values.items():
+            tile, bit = pos_to_index(pos), 1 << (value - 1)
+            if placed[tile] or not candidates[tile] & bit or not place(tile, bit):
+                return []
+
+        empty = [tile for tile in range(81) if not placed[tile]]
+        solutions = []
+
+        def search() -> bool:
+            best, best_count = -1, 10
+            for tile in empty:
+                if not placed[tile]:
+                    count = candidates[tile].bit_count()
+                    if count < best_count:
+                        best, best_count = tile, count
+                        if count <= 1:
+                            break
+
+            if best < 0:
+                solutions.append({POSITIONS[tile]: bit.bit_length() for tile, bit in enumerate(placed)})
+                return len(solutions) >= limit
+            if best_count == 0:
+                return False
+
+            choices = candidates[best]
+            if best_count > 1:
+                # A digit with no place left in a house is a dead end, one with a single place is forced
+                for tiles in house_tiles:
+                    once = twice = done = 0
+                    for tile in tiles:
+                        if placed[tile]:
+                            done |= placed[tile]
+                        else:
+                            twice |= once & candidates[tile]
+                            once |= candidates[tile]
+                    if once | done != ALL_DIGITS:
+                        return False
+                    single = once & ~twice & ~done
+                    if single:
+                        choices = single & -single
+                        best = next(tile for tile in tiles if not placed[tile] and candidates[tile] & choices)
+                        break
+
+            mark = len(trail)
+            while choices:
+                bit = choices & -choices
+                choices ^= bit
+                found = place(best, bit) and search()
+                placed[best] = 0
+                while len(trail) > mark:
+                    candidates[trail.pop()] |= bit
+                if found:
+                    return True
+            return False
+
+        search()
+        return solutions
+
+
+def solve(level) -> dict[tuple[int, int], int] | None:
+    """Solves a level whose rules are all exact cover houses (rows, columns, boxes, diagonals)."""
+    solutions = ExactCoverSolver.from_ruleset(level.ruleset).solve(level.start_values)
+    return solutions[0] if solutions else None
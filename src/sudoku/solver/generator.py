@@ -0,0 +1,97 @@
+import random
+from enum import Enum
+from multiprocessing import Pool
+from typing import Iterator
+
+from .exact_cover import ExactCoverSolver
+from ..rules.rule import POSITIONS
+from ..rules.global_rules import SudokuRule
+
+
+# Every puzzle is checked against the same classic rules, so one solver serves every call in the process
+CLASSIC_SOLVER = ExactCoverSolver.from_ruleset({SudokuRule()})
+
+
+class Symmetry(Enum):
+    NONE = "none"
+    ROTATIONAL = "rotational"
+    MIRROR = "mirror"
+    DIAGONAL = "diagonal"
+
+    def orbit(self, pos: tuple[int, int]) -> tuple[tuple[int, int], ...]:
+        """Tiles that must be cleared together with pos to keep the symmetry."""
+        x, y = pos
+        match self:
+            case Symmetry.ROTATIONAL:
+                other = (8 - x, 8 - y)
+            case Symmetry.MIRROR:
+                other = (8 - x, y)
+            case Symmetry.DIAGONAL:
+                other = (y, x)
+            case _:
+                other = pos
+        return tuple(sorted({pos, other}))
+
+
+def random_solution(rng: random.Random) -> dict[tuple[int, int], int]:
+    # The three boxes on the main diagonal share no row or column, so any fill of them can be completed
+    start = {}
+    for box in range(3):
+        for k, digit in enumerate(rng.sample(range(1, 10), 9)):
+            start[(box * 3 + k % 3, box * 3 + k // 3)] = digit
+    return CLASSIC_SOLVER.solve(start)[0]
+
+
+def generate_puzzle(
+        clues=0, symmetry=Symmetry.ROTATIONAL, rng: random.Random = None, attempts=10
+) -> dict[tuple[int, int], int] | None:
+    """Digs a uniquely solvable classic puzzle out of a random solution, clearing symmetric groups of tiles
+    in random order while the puzzle stays unique.
+    clues: Stop once at most this many clues are left, 0 to dig as far as possible
+    attempts: Solutions to try before giving up on reaching the clue count"""
+    rng = rng or random.Random()
+
+    for _ in range(attempts):
+        values = random_solution(rng)
+        orbits = list(dict.fromkeys(symmetry.orbit(pos) for pos in POSITIONS))
+        rng.shuffle(orbits)
+
+        for orbit in orbits:
+            if len(values) <= clues:
+                break
+            removed = {pos: values.pop(pos) for pos in orbit}
+            if len(CLASSIC_SOLVER.solve(values, 2)) != 1:
+                values.update(removed)
+
+        if len(values) <= clues or not clues:
+            return values
+    return None
+
+
+def _generate_task(task: tuple[int, int, Symmetry]) -> dict[tuple[int, int], int] | None:
+    seed, clues, symmetry = task
+    return generate_puzzle(clues, symmetry, random.Random(seed))
+
+
+def generate(
+        count: int, clues=0, symmetry=Symmetry.ROTATIONAL, processes: int = None, seed: int = None
+) -> Iterator[dict[tuple[int, int], int]]:
+    """Generates puzzles across a pool of worker processes, yielding each one as soon as it is done.
+    Stops early if a whole round of workers fails to reach the clue count."""
+    rng = random.Random(seed)
+    remaining = count
+
+    with Pool(processes) as pool:
+        while remaining > 0:
+            tasks = [(rng.getrandbits(64), clues, symmetry) for _ in range(remaining)]
+            generated = 0
+            for values in pool.imap_unordered(_generate_task, tasks):
+                if values is not None:
+                    generated += 1
+                    yield values
+
+            if not generated:
+                print(f"[Generator]: Unable to reach {clues} clues, stopped {remaining} puzzle(s) short.")
+                return
+            remaining -= generated
+
@@ -0,0 +1,195 @@
+from enum import Enum, auto
+from threading import Event
+from time import perf_counter
+from typing import Callable
+
+from ..rules.rule import Rule, ComponentRule, POSITIONS, ALL_DIGITS, pos_to_index, mask_to_positions
+from ..rules.compiled import CompiledRuleset
+
+
+class SolveStatus(Enum):
+    SOLVED = auto()
+    NO_SOLUTION = auto()
+    TIMEOUT = auto()
+    CANCELLED = auto()
+
+
+class SolveResult:
+
+    def __init__(self, status: SolveStatus, solutions: list[dict[tuple[int, int], int]], nodes: int, elapsed: float):
+        """status: SOLVED once the search found its solutions or ran out of branches with at least one
+        solutions: Every solution found, each as a dict of every position's value
+        nodes: Number of search nodes visited
+        elapsed: Time spent searching, in seconds"""
+        self.status = status
+        self.solutions = solutions
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    @property
+    def solution(self) -> dict[tuple[int, int], int] | None:
+        return self.solutions[0] if self.solutions else None
+
+    def __repr__(self):
+        return f"SolveResult({self.status.name}, solutions={len(self.solutions)}, nodes={self.nodes}, elapsed={self.elapsed:.3f}s)"
+
+
+class PropagationSolver:
+    """
+    Backtracking solver for any ruleset. Each tile keeps a bitmask of its candidates (bit d - 1 for digit d).
+    After every guess the candidates are narrowed to a fixpoint by naked singles (through the rules' peers),
+    hidden singles (through the global rules' houses) and the component rules' own propagate(),
+    then the search branches on the tile with the fewest candidates per past contradiction (dom/wdeg),
+    which keeps sparse grids from thrashing in one corner.
+    """
+
+    CHECK_INTERVAL = 64
+
+    # Peer lists per peer masks, shared by every solver of the same layout
+    __peer_lists: dict[tuple, list] = {}
+
+    def __init__(self, ruleset: set[Rule] | CompiledRuleset):
+        """ruleset: Rules to solve for, or their compiled form when the caller already has it"""
+        compiled = ruleset if isinstance(ruleset, CompiledRuleset) else CompiledRuleset(ruleset)
+        self.component_rules = [rule for rule in compiled.rules if isinstance(rule, ComponentRule)]
+
+        peers = compiled.peer_masks
+        if peers not in PropagationSolver.__peer_lists:
+            PropagationSolver.__peer_lists[peers] = [
+                tuple(pos_to_index(pos) for pos in mask_to_positions(mask)) for mask in peers
+            ]
+        self.peers = PropagationSolver.__peer_lists[peers]
+        self.houses = compiled.houses
+        self.rule_cells = [tuple(pos_to_index(pos) for pos in rule.bound_to) for rule in self.component_rules]
+
+        # How often each tile took part in a contradiction, so the search branches on the troublesome ones first
+        self.weights = [1] * 81
+
+    def solve(
+            self, start_values: dict[tuple[int, int], int], limit=1, time_budget: float = None,
+            cancel: Event = None, progress: Callable[[int, int], None] = None
+    ) -> SolveResult:
+        """start_values: Given digits
+        limit: Stop after this many solutions
+        time_budget: Give up after this many seconds
+        cancel: Stop as soon as this event is set
+        progress: Called as progress(nodes, solutions) every CHECK_INTERVAL nodes"""
+        start = perf_counter()
+        deadline = start + time_budget if time_budget is not None else None
+        solutions = []
+        nodes = 0
+        stopped = None
+        self.weights = [1] * 81
+        weights = self.weights
+
+        candidates = [ALL_DIGITS] * 81
+        for pos, value in start_values.items():
+            if value:
+                candidates[pos_to_index(pos)] &= 1 << (value - 1)
+
+        def search(candidates: list[int], placed: list[bool]) -> bool:
+            nonlocal nodes, stopped
+            nodes += 1
+            if nodes % PropagationSolver.CHECK_INTERVAL == 0:
+                if cancel is not None and cancel.is_set():
+                    stopped = SolveStatus.CANCELLED
+                elif deadline is not None and perf_counter() > deadline:
+                    stopped = SolveStatus.TIMEOUT
+                if progress is not None:
+                    progress(nodes, len(solutions))
+            if stopped:
+                return True
+
+            if not self.propagate(candidates, placed):
+                return False
+
+            # Fewest candidates per contradiction weight
+            best, best_score = -1, 0
+            for i, c in enumerate(candidates):
+                count = c.bit_count()
+                if count > 1 and weights[i] / count > best_score:
+                    best, best_score = i, weights[i] / count
+
+            if best < 0:
+                solutions.append({POSITIONS[i]: c.bit_length() for i, c in enumerate(candidates)})
+                return len(solutions) >= limit
+
+            c = candidates[best]
+            while c:
+                bit = c & -c
+                c ^= bit
+                branch = candidates[:]
+                branch[best] = bit
+                if search(branch, placed[:]):
+                    return True
+            return False
+
+        search(candidates, [False] * 81)
+
+        if stopped:
+            status = stopped
+        else:
+            status = SolveStatus.SOLVED if solutions else SolveStatus.NO_SOLUTION
+        return SolveResult(status, solutions, nodes, perf_counter() - start)
+
+    def propagate(self, candidates: list[int], placed: list[bool] = None) -> bool:
+        """Narrows the candidates in place until nothing changes. Returns False on a contradiction.
+        placed: Tiles whose digit was already removed from their peers, updated in place"""
+        peers = self.peers
+        weights = self.weights
+        if placed is None:
+            placed = [False] * 81
+
+        while True:
+            before = candidates[:]
+
+            # Naked singles: a solved tile removes its digit from its peers
+            for i in range(81):
+                c = candidates[i]
+                if placed[i] or c & (c - 1):
+                    continue
+                if not c:
+                    weights[i] += 1
+                    return False
+                placed[i] = True
+                for j in peers[i]:
+                    if candidates[j] & c:
+                        candidates[j] &= ~c
+                        if not candidates[j]:
+                            weights[i] += 1
+                            weights[j] += 1
+                            return False
+
+            # Hidden singles: a digit with only one place left in a house goes there
+            for house in self.houses:
+                seen = seen_twice = 0
+                for i in house:
+                    seen_twice |= seen & candidates[i]
+                    seen |= candidates[i]
+                if seen != ALL_DIGITS:
+                    for i in house:
+                        weights[i] += 1
+                    return False
+                once = seen & ~seen_twice
+                if once:
+                    for i in house:
+                        c = candidates[i] & once
+                        if c and c != candidates[i]:
+                            if c & (c - 1):
+                                weights[i] += 1
+                                return False
+                            candidates[i] = c
+
+            for rule, cells in zip(self.component_rules, self.rule_cells):
+                if not rule.propagate(candidates):
+                    for i in cells:
+                        weights[i] += 1
+                    return False
+
+            if candidates == before:
+                return True
+
+
+def solve_level(level, **kwargs) -> SolveResult:
+    """Solves a level with the propagation solver. Keyword arguments are passed to PropagationSolver.solve."""
+    return PropagationSolver(level.ruleset).solve(level.start_values, **kwargs)
@@ -0,0 +1,292 @@
+import os
+import pickle
+from enum import Enum
+from itertools import combinations
+from multiprocessing import Pool
+from threading import Event
+
+from .propagation import PropagationSolver
+from ..rules.rule import Rule, ALL_DIGITS, pos_to_index
+
+
+class Technique(Enum):
+    NAKED_SINGLE = ("Naked single", 1)
+    HIDDEN_SINGLE = ("Hidden single", 2)
+    RULE_DEDUCTION = ("Rule deduction", 3)
+    LOCKED_CANDIDATES = ("Locked candidates", 5)
+    NAKED_PAIR = ("Naked pair", 8)
+    HIDDEN_PAIR = ("Hidden pair", 10)
+    NAKED_TRIPLE = ("Naked triple", 12)
+    HIDDEN_TRIPLE = ("Hidden triple", 15)
+    X_WING = ("X-Wing", 20)
+
+    def __init__(self, label: str, weight: int):
+        self.label = label
+        self.weight = weight
+
+
+class Rating:
+    DIFFICULTIES = ((2, "Easy"), (5, "Medium"), (15, "Hard"), (20, "Expert"))
+
+    def __init__(self, solved: bool, techniques: dict[Technique, int]):
+        """solved: False when the techniques ran out before the grid was filled
+        techniques: How many times each technique made progress"""
+        self.solved = solved
+        self.techniques = techniques
+
+    @property
+    def hardest(self) -> Technique | None:
+        return max(self.techniques, key=lambda t: t.weight, default=None)
+
+    @property
+    def score(self) -> int:
+        """Weighted sum of every technique use. Unsolved grids score above any solved one."""
+        score = sum(t.weight * n for t, n in self.techniques.items())
+        return score if self.solved else score + 10000
+
+    @property
+    def difficulty(self) -> str:
+        if not self.solved:
+            return "Extreme"
+        weight = self.hardest.weight if self.hardest else 0
+        for limit, label in Rating.DIFFICULTIES:
+            if weight <= limit:
+                return label
+        return "Expert"
+
+    def __repr__(self):
+        used = ', '.join(f"{t.label} x{n}" for t, n in sorted(self.techniques.items(), key=lambda _: _[0].weight))
+        return f"Rating({self.difficulty}, score={self.score}, {used})"
+
+
+class LogicalSolver(PropagationSolver):
+    """
+    Solves like a person would, always using the simplest technique that makes progress
+    and counting which techniques were needed.
+    """
+
+    __intersections: dict[tuple, tuple] = {}
+
+    def __init__(self, ruleset: set[Rule]):
+        super().__init__(ruleset)
+
+        self.rows = {house[0] // 9: house for house in self.houses if len({i // 9 for i in house}) == 1}
+        self.columns = {house[0] % 9: house for house in self.houses if len({i % 9 for i in house}) == 1}
+        if self.houses not in LogicalSolver.__intersections:
+            LogicalSolver.__intersections[self.houses] = tuple(
+                (a, b, tuple(set(a) & set(b)))
+                for a in self.houses for b in self.houses
+                if a is not b and len(set(a) & set(b)) > 1
+            )
+        self.intersections = LogicalSolver.__intersections[self.houses]
+        self.steps = (
+            (Technique.NAKED_SINGLE, self.__naked_singles),
+            (Technique.HIDDEN_SINGLE, self.__hidden_singles),
+            (Technique.RULE_DEDUCTION, self.__rule_deductions),
+            (Technique.LOCKED_CANDIDATES, self.__locked_candidates),
+            (Technique.NAKED_PAIR, lambda c: self.__naked_subsets(c, 2)),
+            (Technique.HIDDEN_PAIR, lambda c: self.__hidden_subsets(c, 2)),
+            (Technique.NAKED_TRIPLE, lambda c: self.__naked_subsets(c, 3)),
+            (Technique.HIDDEN_TRIPLE, lambda c: self.__hidden_subsets(c, 3)),
+            (Technique.X_WING, self.__x_wings),
+        )
+
+    def rate(self, start_values: dict[tuple[int, int], int]) -> Rating:
+        techniques = {}
+        try:
+            candidates = self.__start(start_values)
+            while not all(self.placed):
+                for technique, step in self.steps:
+                    if uses := step(candidates):
+                        techniques[technique] = techniques.get(technique, 0) + uses
+                        break
+                else:
+                    return Rating(False, techniques)
+        except _Contradiction:
+            return Rating(False, techniques)
+        return Rating(True, techniques)
+
+    def next_step(self, values: dict[tuple[int, int], int], cancel: Event = None) -> tuple | None:
+        """Applies the simplest technique that makes progress on a partly filled grid.
+        Returns (technique, candidates before, candidates after), or None when stuck or cancelled.
+        Raises ValueError when the grid contradicts the rules."""
+        try:
+            candidates = self.__start(values)
+            for technique, step in self.steps:
+                if cancel is not None and cancel.is_set():
+                    return None
+                before = candidates[:]
+                if step(candidates):
+                    return technique, before, candidates
+        except _Contradiction:
+            raise ValueError("The grid contradicts the rules.")
+        return None
+
+    def __start(self, values: dict[tuple[int, int], int]) -> list[int]:
+        """Candidates left once the filled tiles are removed from their peers. Filling them is not a deduction."""
+        candidates = [ALL_DIGITS] * 81
+        self.placed = [False] * 81
+        for pos, value in values.items():
+            if value:
+                i = pos_to_index(pos)
+                if not candidates[i] >> (value - 1) & 1:
+                    raise _Contradiction
+                candidates[i] = 1 << (value - 1)
+                self.placed[i] = True
+                for j in self.peers[i]:
+                    self.__eliminate(candidates, j, candidates[i])
+        return candidates
+
+    def __eliminate(self, candidates: list[int], i: int, mask: int) -> bool:
+        if not candidates[i] & mask:
+            return False
+        candidates[i] &= ~mask
+        if not candidates[i]:
+            raise _Contradiction
+        return True
+
+    def __naked_singles(self, candidates: list[int]) -> int:
+        uses = 0
+        for i in range(81):
+            c = candidates[i]
+            if self.placed[i] or c & (c - 1):
+                continue
+            self.placed[i] = True
+            uses += 1
+            for j in self.peers[i]:
+                self.__eliminate(candidates, j, c)
+        return uses
+
+    def __hidden_singles(self, candidates: list[int]) -> int:
+        uses = 0
+        for house in self.houses:
+            seen = seen_twice = 0
+            for i in house:
+                seen_twice |= seen & candidates[i]
+                seen |= candidates[i]
+            if seen != ALL_DIGITS:
+                raise _Contradiction
+            once = seen & ~seen_twice
+            for i in house:
+                c = candidates[i] & once
+                if c and c != candidates[i]:
+                    if c & (c - 1):
+                        raise _Contradiction
+                    candidates[i] = c
+                    uses += 1
+        return uses
+
+    def __rule_deductions(self, candidates: list[int]) -> int:
+        uses = 0
+        for rule in self.component_rules:
+            before = candidates[:]
+            if not rule.propagate(candidates):
+                raise _Contradiction
+            uses += candidates != before
+        return uses
+
+    def __locked_candidates(self, candidates: list[int]) -> int:
+        uses = 0
+        for a, b, shared in self.intersections:
+            inside = outside = 0
+            for i in a:
+                if i in shared:
+                    inside |= candidates[i]
+                else:
+                    outside |= candidates[i]
+
+            # Digits of a that only fit where a meets b can't go anywhere else in b
+            locked = inside & ~outside
+            if not locked:
+                continue
+            eliminated = False
+            for i in b:
+                if i not in shared and candidates[i] & locked:
+                    eliminated |= self.__eliminate(candidates, i, locked)
+            uses += eliminated
+        return uses
+
+    def __naked_subsets(self, candidates: list[int], size: int) -> int:
+        uses = 0
+        for house in self.houses:
+            open_cells = [i for i in house if candidates[i] & (candidates[i] - 1)]
+            for cells in combinations([i for i in open_cells if candidates[i].bit_count() <= size], size):
+                digits = 0
+                for i in cells:
+                    digits |= candidates[i]
+                if digits.bit_count() != size:
+                    continue
+                eliminated = False
+                for i in open_cells:
+                    if i not in cells:
+                        eliminated |= self.__eliminate(candidates, i, digits)
+                uses += eliminated
+        return uses
+
+    def __hidden_subsets(self, candidates: list[int], size: int) -> int:
+        uses = 0
+        for house in self.houses:
+            open_cells = [i for i in house if candidates[i] & (candidates[i] - 1)]
+            open_digits = 0
+            for i in open_cells:
+                open_digits |= candidates[i]
+            digits = [1 << d for d in range(9) if open_digits >> d & 1]
+
+            for subset in combinations(digits, size):
+                mask = sum(subset)
+                cells = [i for i in open_cells if candidates[i] & mask]
+                if len(cells) != size or any(not any(candidates[i] & d for i in cells) for d in subset):
+                    continue
+                eliminated = False
+                for i in cells:
+                    eliminated |= self.__eliminate(candidates, i, ALL_DIGITS & ~mask)
+                uses += eliminated
+        return uses
+
+    def __x_wings(self, candidates: list[int]) -> int:
+        uses = 0
+        for lines, crossing, other in (
+                (self.rows, self.columns, lambda i: i % 9),
+                (self.columns, self.rows, lambda i: i // 9)
+        ):
+            for digit in range(9):
+                bit = 1 << digit
+                spots = {}
+                for line in lines.values():
+                    cells = [i for i in line if candidates[i] & bit and not self.placed[i]]
+                    if len(cells) == 2:
+                        spots.setdefault(tuple(other(i) for i in cells), []).append(cells)
+
+                # Two lines with the digit in the same two spots claim it for both crossing lines
+                for key, found in spots.items():
+                    if len(found) != 2 or not all(k in crossing for k in key):
+                        continue
+                    wing = set(found[0] + found[1])
+                    eliminated = False
+                    for k in key:
+                        for i in crossing[k]:
+                            if i not in wing:
+                                eliminated |= self.__eliminate(candidates, i, bit)
+                    uses += eliminated
+        return uses
+
+
+class _Contradiction(Exception):
+    pass
+
+
+def rate_level(level) -> Rating:
+    return LogicalSolver(level.ruleset).rate(level.start_values)
+
+
+def _rate_file(path: str) -> tuple[str, Rating]:
+    with open(path, 'rb') as f:
+        return path, rate_level(pickle.load(f))
+
+
+def rate_directory(path: str, processes: int = None) -> list[tuple[str, Rating]]:
+    """Rates every level file in a directory across a pool of worker processes, easiest first."""
+    files = [f"{path}/{name}" for name in sorted(os.listdir(path)) if name.endswith('.dat')]
+    with Pool(processes) as pool:
+        ratings = pool.map(_rate_file, files, chunksize=max(1, len(files) // (4 * (processes or os.cpu_count()))))
+    return sorted(ratings, key=lambda _: _[1].score)
@@ -0,0 +1,49 @@
+from threading import Event
+from time import perf_counter
+
+from .exact_cover import ExactCoverSolver, SolverError
+from .propagation import PropagationSolver, SolveStatus
+
+
+class SolutionCount:
+
+    def __init__(self, status: SolveStatus, solutions: list[dict[tuple[int, int], int]], elapsed: float):
+        self.status = status
+        self.solutions = solutions
+        self.elapsed = elapsed
+
+    @property
+    def count(self) -> int:
+        return len(self.solutions)
+
+    @property
+    def is_unique(self) -> bool:
+        return self.status is SolveStatus.SOLVED and self.count == 1
+
+    @property
+    def differing(self) -> set[tuple[int, int]]:
+        """Tiles whose value differs between the first two solutions."""
+        if self.count < 2:
+            return set()
+        first, second = self.solutions[:2]
+        return {pos for pos, value in first.items() if second[pos] != value}
+
+    def __repr__(self):
+        return f"SolutionCount({self.status.name}, count={self.count}, differing={len(self.differing)}, elapsed={self.elapsed:.3f}s)"
+
+
+def count_solutions(level, limit=2, time_budget: float = None, cancel: Event = None) -> SolutionCount:
+    """Counts the solutions of a level, stopping as soon as `limit` of them are found.
+    Levels made only of houses (rows, columns, boxes, diagonals) go through the exact cover solver,
+    anything else through the propagation solver."""
+    start = perf_counter()
+    try:
+        solutions = ExactCoverSolver.from_ruleset(level.ruleset).solve(level.start_values, limit)
+    except SolverError:
+        result = PropagationSolver(level.ruleset).solve(
+            level.start_values, limit, time_budget=time_budget, cancel=cancel
+        )
+        return SolutionCount(result.status, result.solutions, perf_counter() - start)
+
+    status = SolveStatus.SOLVED if solutions else SolveStatus.NO_SOLUTION
+    return SolutionCount(status, solutions, perf_counter() - start)
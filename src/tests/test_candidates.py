@@ -0,0 +1,84 @@
+"""Auto-candidates kept up per change, checked against candidates worked out from scratch.
+
+Run from the repository root: PYTHONPATH=src python -m pytest src/tests
+"""
+import random
+
+import pygame as pg
+import pytest
+
+pg.init()
+
+from sudoku.candidates import AutoCandidates
+from sudoku.grid import Grid, InputMode
+from sudoku.rules import SudokuRule, DiagonalRule, KnightRule, KillerRule
+from sudoku.rules.rule import RuleManager, POSITIONS
+
+
+def wired(rules: set) -> tuple[Grid, RuleManager, AutoCandidates]:
+    """A grid, rule manager and auto-candidates connected the way Board connects them."""
+    grid, manager = Grid(), RuleManager(rules)
+    grid.on_changed.add_handler(manager.update_many)
+    grid.on_loaded.add_handler(manager.load_values)
+    candidates = AutoCandidates(grid, manager)
+    candidates.set_enabled(True)
+    return grid, manager, candidates
+
+
+def expected_marks(grid: Grid, manager: RuleManager) -> dict[tuple[int, int], int]:
+    """Digits no tile of the same value rules out, for every empty tile, asking each rule directly."""
+    values = grid.get_numbered_tiles()
+    marks = {}
+    for pos in POSITIONS:
+        if pos in values:
+            continue
+        seen = {value for other, value in values.items() if any(rule.conflict(pos, other) for rule in manager.rules)}
+        marks[pos] = sum(1 << (digit - 1) for digit in range(1, 10) if digit not in seen)
+    return marks
+
+
+def marks_of(grid: Grid) -> dict[tuple[int, int], int]:
+    return {(x, y): tile.mark for y, row in enumerate(grid.tiles) for x, tile in enumerate(row) if not tile.value}
+
+
+@pytest.mark.parametrize("rules", [
+    {SudokuRule()},
+    {SudokuRule(), DiagonalRule(), KillerRule(0, {(4, 4), (5, 4), (5, 5)})},
+    {KnightRule(), KillerRule(10, {(0, 0), (1, 0), (2, 0), (2, 1)})},
+])
+def test_update_many_matches_rebuilt(rules):
+    rng = random.Random(0)
+    grid, manager, _ = wired(rules)
+    grid.load({pos: value for pos, value in zip(rng.sample(POSITIONS, 10), range(1, 10))})
+    assert marks_of(grid) == expected_marks(grid, manager)
+
+    for _ in range(60):
+        tiles = rng.sample(POSITIONS, rng.randint(1, 4))
+        grid.fill_tiles(rng.randint(1, 9), InputMode.INPUT_MODE_VALUE, tiles)
+        assert marks_of(grid) == expected_marks(grid, manager)
+
+
+def test_crossed_out_candidates_come_back_when_possible_again():
+    grid, manager, _ = wired({SudokuRule()})
+    grid.toggle_mark((0, 0), 5)
+    assert not grid.tiles[0][0].mark & 1 << 4
+
+    # Unrelated to 5, the crossed out candidate stays out
+    grid.set_value((8, 0), 3)
+    assert grid.tiles[0][0].mark == expected_marks(grid, manager)[(0, 0)] & ~(1 << 4)
+
+    # Ruled out by a peer, then possible again
+    grid.set_value((0, 8), 5)
+    grid.set_value((0, 8), 5)
+    assert grid.tiles[0][0].mark == expected_marks(grid, manager)[(0, 0)]
+
+
+def test_edited_cage_moves_its_peers():
+    cage = KillerRule(0, {(0, 0), (1, 1)})
+    grid, manager, _ = wired({cage})
+    grid.set_value((0, 0), 4)
+    assert not grid.tiles[1][1].mark & 1 << 3
+
+    cage.set_properties(0, [(0, 0), (0, 1)])
+    manager.refresh(cage)
+    assert marks_of(grid) == expected_marks(grid, manager)
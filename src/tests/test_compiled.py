@@ -0,0 +1,100 @@
+"""The batched validator, checked against the rule manager evaluating the same grids one by one.
+
+Run from the repository root: PYTHONPATH=src python -m pytest src/tests
+"""
+import random
+
+import numpy as np
+import pygame as pg
+import pytest
+
+pg.init()
+
+from sudoku.rules import (
+    SudokuRule, KnightRule, KillerRule, ThermometerRule, EvenRule, OddRule, CompiledRuleset, validate_grids
+)
+from sudoku.rules import compiled
+from sudoku.rules.rule import RuleManager, POSITIONS
+from sudoku.solver import ExactCoverSolver, Symmetry, generate_puzzle
+from tests.test_rule_manager import mixed_rules
+
+
+def as_array(values: dict[tuple[int, int], int]) -> np.ndarray:
+    grid = np.zeros((9, 9), dtype=np.uint8)
+    for (x, y), value in values.items():
+        grid[y, x] = value
+    return grid
+
+
+def grids_around(solution: dict[tuple[int, int], int], rng: random.Random, count: int) -> list[dict]:
+    """The solution with a few digits changed, every other grid partly erased."""
+    grids = []
+    for i in range(count):
+        values = dict(solution)
+        for _ in range(rng.randint(0, 3)):
+            values[rng.choice(POSITIONS)] = rng.randint(1, 9)
+        if i % 2:
+            for pos in rng.sample(POSITIONS, rng.randint(1, 60)):
+                values.pop(pos)
+        grids.append(values)
+    return grids
+
+
+def rulesets(solution: dict[tuple[int, int], int]) -> list[set]:
+    """Rules the solution keeps, so some grids pass, and rules of every kind it mostly breaks.
+    The last thermometer lies flat over two tiles holding the same digit, which no other rule ties together."""
+    cage = [(3, 3), (4, 3), (3, 4)]
+    kept = {
+        SudokuRule(),
+        KillerRule(sum(solution[pos] for pos in cage), set(cage)),
+        EvenRule(next(pos for pos in POSITIONS if solution[pos] % 2 == 0)),
+        OddRule(next(pos for pos in POSITIONS if solution[pos] % 2 == 1)),
+    }
+    flat = next((p1, p2) for p1 in POSITIONS for p2 in POSITIONS
+                if solution[p1] == solution[p2] and p1[0] // 3 != p2[0] // 3 and p1[1] // 3 != p2[1] // 3)
+    return [
+        kept,
+        mixed_rules(),
+        {SudokuRule(), KnightRule(), KillerRule(0, {(0, 0), (2, 1)})},
+        {SudokuRule(), ThermometerRule(list(flat))},
+    ]
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_validate_agrees_with_rule_manager(seed):
+    rng = random.Random(seed)
+    solution = ExactCoverSolver.from_ruleset({SudokuRule()}).solve(generate_puzzle(0, Symmetry.NONE, rng), 1)[0]
+    for i, ruleset in enumerate(rulesets(solution)):
+        grids = grids_around(solution, rng, 120)
+        valid, conflicts = validate_grids(np.array([as_array(values) for values in grids]), ruleset)
+
+        for values, grid_valid, grid_conflicts in zip(grids, valid, conflicts):
+            manager = RuleManager(ruleset)
+            manager.load_values(values)
+            flagged = {(x, y) for x, y in POSITIONS if grid_conflicts[y, x]}
+            broken = {rule for rule in manager.active_rules & manager.component_rules if not rule.check()}
+
+            # Repeated digits are flagged alike. Other constraints are flagged whole, once all their tiles are filled,
+            # where the rules themselves may only point out some of their tiles, or none before they're filled
+            assert set(manager.conflicts) <= flagged
+            assert flagged <= set(manager.conflicts) | {pos for rule in broken for pos in rule.bound_to}
+            assert grid_valid == (not flagged)
+            if len(values) == 81:
+                assert grid_valid == manager.check()
+                assert all(flagged & set(rule.bound_to) for rule in broken)
+
+        # The solution keeps the first ruleset, so grids near it are found both ways
+        if i == 0:
+            assert valid.any() and not valid.all()
+
+
+def test_validate_in_batches(monkeypatch):
+    rng = random.Random(2)
+    solution = ExactCoverSolver.from_ruleset({SudokuRule()}).solve(generate_puzzle(0, Symmetry.NONE, rng), 1)[0]
+    ruleset = CompiledRuleset(mixed_rules())
+    grids = np.array([as_array(values) for values in grids_around(solution, rng, 50)])
+
+    whole = ruleset.validate(grids)
+    monkeypatch.setattr(compiled, "VALIDATE_BATCH_SIZE", 7)
+    batched = ruleset.validate(grids)
+    assert all(np.array_equal(a, b) for a, b in zip(whole, batched))
@@ -0,0 +1,35 @@
+"""Dead end checks, and the copy of the rules they run against.
+
+Run from the repository root: PYTHONPATH=src python -m pytest src/tests
+"""
+import pygame as pg
+
+pg.init()
+
+from sudoku.dead_end import DeadEndService, is_solvable
+from sudoku.rules import SudokuRule, KillerRule
+
+
+def test_is_solvable():
+    cage = KillerRule(3, {(0, 0), (1, 0)})
+    assert is_solvable({SudokuRule(), cage}, {(0, 0): 1})
+    # The cage can only hold 1 and 2
+    assert is_solvable({SudokuRule(), cage}, {(0, 0): 3}) is False
+    # 1 can't go anywhere else in the top row
+    assert is_solvable({SudokuRule(), cage}, {(5, 0): 1, (0, 1): 2}) is False
+
+
+def test_checks_against_rules_as_set():
+    cage = KillerRule(3, {(0, 0), (1, 0)})
+    service = DeadEndService()
+    service.set_rules({SudokuRule(), cage})
+
+    # Edits made while a check runs don't reach it, the next set_rules picks them up
+    cage.set_properties(17, [(0, 0), (1, 0)])
+    copied = next(rule for rule in service.ruleset if isinstance(rule, KillerRule))
+    assert copied is not cage and copied.target == 3
+
+    service.set_rules({SudokuRule(), cage})
+    copied = next(rule for rule in service.ruleset if isinstance(rule, KillerRule))
+    assert copied.target == 17
+    service.cancel()
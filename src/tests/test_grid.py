@@ -0,0 +1,159 @@
+"""Grid backends, checked against each other through their public API.
+
+Run from the repository root: PYTHONPATH=src python -m pytest src/tests
+"""
+from core.action import ActionManager
+from sudoku.grid import Grid, ArrayGrid, InputMode
+
+
+def state_of(grid: Grid) -> tuple:
+    tiles = tuple(
+        (tile.value, tile.mark, tile.color, tile.locked, tile.highlight) for row in grid.tiles for tile in row
+    )
+    return tiles, grid.get_numbered_tiles(), grid.is_complete()
+
+
+class Recorder:
+    """Every report a grid's handlers get, in order."""
+
+    def __init__(self, grid: Grid):
+        self.reports = []
+        grid.on_changed.add_handler(self.values_changed)
+        grid.on_changed.add_handler(self.tiles_changed)
+        grid.on_loaded.add_handler(self.loaded)
+
+    def values_changed(self, new_values: dict, old_values: dict):
+        self.reports.append(("values", dict(new_values), dict(old_values)))
+
+    def tiles_changed(self, positions: set):
+        self.reports.append(("tiles", set(positions)))
+
+    def loaded(self, values: dict):
+        self.reports.append(("loaded", dict(values)))
+
+
+def play(grid: Grid):
+    """Goes through every kind of edit, yielding after each one."""
+    box = [(x, y) for y in range(3) for x in range(3)]
+    grid.load({(0, 0): 1, (4, 4): 5, (8, 8): 9}, lock=True)
+    yield
+    grid.fill_tiles(3, InputMode.INPUT_MODE_VALUE, box)
+    yield
+    grid.fill_tiles(3, InputMode.INPUT_MODE_VALUE, [(1, 0)])
+    yield
+    grid.fill_tiles(7, InputMode.INPUT_MODE_MARK, box)
+    yield
+    grid.fill_tiles(2, InputMode.INPUT_MODE_MARK, [(2, 2), (5, 5)])
+    yield
+    grid.fill_tiles(4, InputMode.INPUT_MODE_COLOR, [(0, 8), (4, 4)])
+    yield
+    grid.fill_tiles(4, InputMode.INPUT_MODE_COLOR, [(0, 8), (1, 8)])
+    yield
+    grid.highlight_conflicts({(1, 1), (2, 1)}, set())
+    yield
+    grid.highlight_conflicts({(2, 1)}, {(1, 1), (2, 1)})
+    yield
+    ActionManager.undo()
+    yield
+    ActionManager.redo()
+    yield
+    snapshot = grid.snapshot()
+    grid.load({pos: (pos[0] + pos[1] * 3 + pos[1] // 3) % 9 + 1 for pos in [(x, y) for y in range(9) for x in range(9)]})
+    yield
+    grid.restore(snapshot)
+    yield
+    with grid.batch():
+        grid.set_value((6, 6), 8)
+        grid.set_mark((6, 6), 0b101)
+        grid.set_color((6, 6), 2)
+        grid.set_value((6, 6), 8)
+    yield
+    grid.clear()
+    yield
+
+
+def test_backends_agree():
+    grid, array_grid = Grid(), ArrayGrid()
+    recorder, array_recorder = Recorder(grid), Recorder(array_grid)
+
+    for _ in zip(play(grid), play(array_grid)):
+        assert state_of(array_grid) == state_of(grid)
+        assert array_recorder.reports == recorder.reports
+    ActionManager.undo_stack.clear()
+    ActionManager.redo_stack.clear()
+
+
+def test_snapshot_is_a_copy():
+    for grid in Grid(), ArrayGrid():
+        grid.load({(0, 0): 1}, lock=True)
+        grid.set_mark((1, 0), 0b11)
+        snapshot = grid.snapshot()
+        expected = state_of(grid)
+
+        grid.clear()
+        grid.set_value((2, 2), 4)
+        assert snapshot.get_numbered_tiles() == {(0, 0): 1}
+
+        grid.restore(snapshot)
+        assert state_of(grid) == expected
+        # Restored locks hold
+        grid.set_value((0, 0), 2)
+        assert grid.get_numbered_tiles() == {(0, 0): 1}
+
+
+def test_batch_reports_once():
+    grid = Grid()
+    grid.set_value((0, 0), 4)
+    recorder = Recorder(grid)
+
+    with grid.batch():
+        grid.set_value((0, 0), 5)
+        with grid.batch():
+            grid.set_value((0, 0), 6)
+            grid.set_value((1, 0), 2)
+            grid.set_mark((2, 0), 0b1)
+        assert not recorder.reports
+        # Back to where it started, but still reported as changed
+        grid.set_value((3, 0), 7)
+        grid.set_value((3, 0), 7)
+
+    assert recorder.reports == [
+        ("values", {(0, 0): 6, (1, 0): 2, (3, 0): 0}, {(0, 0): 4, (1, 0): 0, (3, 0): 0}),
+        ("tiles", {(0, 0), (1, 0), (2, 0), (3, 0)}),
+    ]
+
+
+def test_unbatched_changes_report_at_once():
+    grid = Grid()
+    recorder = Recorder(grid)
+    grid.set_value((0, 0), 5)
+    grid.set_color((0, 0), 3)
+
+    assert recorder.reports == [
+        ("values", {(0, 0): 5}, {(0, 0): 0}),
+        ("tiles", {(0, 0)}),
+        ("tiles", {(0, 0)}),
+    ]
+
+
+def test_load_replaces_the_grid_in_one_report():
+    grid = Grid()
+    grid.set_value((0, 0), 3, lock=True)
+    grid.set_value((1, 0), 4)
+    grid.set_mark((2, 0), 0b11)
+    grid.set_color((3, 0), 1)
+    recorder = Recorder(grid)
+
+    values = {(1, 0): 5, (8, 8): 9}
+    grid.load(values, lock=True)
+
+    assert recorder.reports == [("loaded", values), ("tiles", {(x, y) for y in range(9) for x in range(9)})]
+    assert state_of(grid)[1:] == (values, False)
+    assert all(not tile.mark and not tile.color for row in grid.tiles for tile in row)
+    assert [pos for pos in values if grid.tiles[pos[1]][pos[0]].locked] == list(values)
+    assert not grid.tiles[0][0].locked
+
+    # Start values can't be changed, the rest of the grid can
+    grid.set_value((1, 0), 2)
+    grid.set_value((0, 0), 2)
+    assert grid.get_numbered_tiles() == {**values, (0, 0): 2}
@@ -0,0 +1,244 @@
+"""RuleManager bookkeeping when rules are edited in place, as the maker's properties panel does.
+
+Run from the repository root: PYTHONPATH=src python -m pytest src/tests
+"""
+import copy
+import random
+
+import pygame as pg
+import pytest
+
+pg.init()
+
+from sudoku.rules import (
+    SudokuRule, RowRule, KillerRule, ThermometerRule, PalindromeRule, SurroundRule, ArrowRule, BlackDotRule, WhiteDotRule,
+    EvenRule, OddRule
+)
+from sudoku.rules.rule import RuleManager
+
+
+def values_of(manager: RuleManager) -> dict[tuple[int, int], int]:
+    return {pos: value for value, tiles in manager.value_to_tile_map.items() for pos in tiles}
+
+
+def mixed_rules() -> set:
+    """One rule of every kind, some of them overlapping."""
+    return {
+        SudokuRule(),
+        KillerRule(15, {(0, 0), (1, 0), (0, 1)}),
+        KillerRule(0, {(4, 4), (5, 4)}),
+        ThermometerRule([(2, 2), (3, 2), (4, 2), (4, 3)]),
+        PalindromeRule([(6, 0), (6, 1), (7, 1), (8, 1)]),
+        ArrowRule([(1, 5), (2, 5), (3, 5)]),
+        BlackDotRule((7, 7), (8, 7)),
+        WhiteDotRule((0, 8), (1, 8)),
+        EvenRule((5, 5)),
+        OddRule((3, 3)),
+        SurroundRule({1, 2, 3}, (6, 6)),
+    }
+
+
+def rule_states(manager: RuleManager) -> dict:
+    """What each component rule says about the values, by kind and tiles, so different instances compare."""
+    return {
+        (type(rule).__name__, tuple(sorted(rule.bound_to))): (rule.check(), frozenset(rule.violations))
+        for rule in manager.component_rules
+    }
+
+
+def assert_matches_rebuilt(manager: RuleManager):
+    """The edited manager holds what a manager built from scratch with the same rules and values would."""
+    rebuilt = RuleManager(copy.deepcopy(manager.rules))
+    rebuilt.load_values(values_of(manager))
+
+    assert manager.conflicts == rebuilt.conflicts
+    assert manager.violations == rebuilt.violations
+    assert len(manager.unsatisfied) == len(rebuilt.unsatisfied)
+    assert manager.check() == rebuilt.check()
+    assert {pos: len(rules) for pos, rules in manager.pos_to_comp_map.items()} == \
+           {pos: len(rules) for pos, rules in rebuilt.pos_to_comp_map.items()}
+    for pos, rules in manager.pos_to_comp_map.items():
+        assert rules <= manager.active_rules
+        assert all(pos in rule.bound_to for rule in rules)
+
+
+def test_edit_cage_into_duplicate():
+    # Either cage may be the one kept, depending on set order, so try a few times
+    for _ in range(20):
+        edited, twin = KillerRule(10, {(0, 0), (1, 0)}), KillerRule(7, {(4, 4), (5, 4)})
+        manager = RuleManager({SudokuRule(), edited, twin})
+        manager.load_values({(0, 0): 4, (1, 0): 6, (4, 4): 3})
+
+        edited.set_properties(7, [(4, 4), (5, 4)])
+        manager.refresh(edited)
+
+        assert len(manager.active_rules & {edited, twin}) == 1
+        assert not manager.pos_to_comp_map.get((0, 0))
+        assert_matches_rebuilt(manager)
+
+        # The kept cage is still enforced
+        manager.update(3, {(5, 4): 0})
+        assert (4, 4) in manager.conflicts
+        assert_matches_rebuilt(manager)
+
+
+def test_edit_cage_tiles_moves_conflicts():
+    cage = KillerRule(0, {(0, 0), (1, 0)})
+    manager = RuleManager({cage})
+    manager.load_values({(0, 0): 5, (1, 0): 5, (4, 4): 5})
+    assert (0, 0) in manager.conflicts
+
+    cage.set_properties(0, [(1, 0), (2, 0)])
+    manager.refresh(cage)
+
+    assert not manager.conflicts
+    assert_matches_rebuilt(manager)
+
+
+def test_edit_cage_target_updates_unsatisfied():
+    cage = KillerRule(10, {(0, 0), (1, 0)})
+    manager = RuleManager({SudokuRule(), cage})
+    manager.load_values({(0, 0): 4, (1, 0): 6})
+    assert manager.check()
+
+    cage.set_properties(11, [(0, 0), (1, 0)])
+    manager.refresh(cage)
+    assert cage in manager.unsatisfied and not manager.check()
+
+    cage.set_properties(3, [(0, 0)])
+    manager.refresh(cage)
+    assert cage in manager.unsatisfied
+    assert_matches_rebuilt(manager)
+
+    cage.set_properties(4, [(0, 0)])
+    manager.refresh(cage)
+    assert manager.check()
+    assert_matches_rebuilt(manager)
+
+
+@pytest.mark.parametrize("rule, properties", [
+    (ThermometerRule([(0, 0), (1, 0), (2, 0)]), ([(3, 3), (4, 3)],)),
+    (PalindromeRule([(0, 0), (1, 0)]), ([(3, 3), (4, 3), (5, 3)],)),
+    (SurroundRule({7, 8, 9}, (0, 0)), ({1, 2}, (3, 3))),
+])
+def test_edit_moves_violations(rule, properties):
+    manager = RuleManager({rule})
+    manager.load_values({(0, 0): 5, (1, 0): 3, (0, 1): 1, (1, 1): 2, (3, 3): 9, (4, 3): 1})
+    assert manager.violations and rule in manager.unsatisfied
+
+    rule.set_properties(*properties)
+    manager.refresh(rule)
+
+    assert manager.violations == {pos: 1 for pos in rule.violations}
+    assert_matches_rebuilt(manager)
+
+
+def test_redundant_rules_reported_when_they_change(capsys):
+    cage = KillerRule(10, {(0, 0), (1, 0)})
+    manager = RuleManager({SudokuRule(), RowRule()})
+    assert manager.redundant_rules
+    assert "redundant" in capsys.readouterr().out
+
+    # Same redundant rules after each of these
+    manager.add_rule(cage)
+    cage.set_properties(11, [(0, 0), (1, 0)])
+    manager.refresh(cage)
+    manager.remove_rule(cage)
+    assert "redundant" not in capsys.readouterr().out
+
+    manager.add_rule(KillerRule(0, {(0, 0), (1, 0)}))
+    assert "redundant" in capsys.readouterr().out
+
+
+def test_batched_updates_report_one_conflict_diff():
+    rng = random.Random(0)
+    cage = KillerRule(0, {(3, 3), (4, 3), (4, 4)})
+    manager = RuleManager({SudokuRule(), cage})
+    reports = []
+    manager.on_conflict_changed.add_handler(lambda old_conflicts, conflicts: reports.append((old_conflicts, conflicts)))
+
+    values = {}
+    for _ in range(50):
+        batch = {(rng.randrange(9), rng.randrange(9)): rng.randint(0, 9) for _ in range(rng.randint(1, 9))}
+        old_values = {pos: values.get(pos, 0) for pos in batch}
+        shown = manager.conflicting_tiles()
+        reports.clear()
+
+        manager.update_many(batch, old_values)
+        values.update(batch)
+
+        assert values_of(manager) == {pos: value for pos, value in values.items() if value}
+        assert_matches_rebuilt(manager)
+        if manager.conflicting_tiles() == shown:
+            assert not reports
+        else:
+            assert reports == [(shown, manager.conflicting_tiles())]
+
+
+def test_load_values_matches_entering_them():
+    rng = random.Random(1)
+    manager = RuleManager(mixed_rules())
+    # Played first, so loading has rule state left over to clear
+    played = {}
+    for _ in range(40):
+        pos = rng.randrange(9), rng.randrange(9)
+        manager.update(rng.randint(1, 9), {pos: played.get(pos, 0)})
+        played = values_of(manager)
+
+    values = {(rng.randrange(9), rng.randrange(9)): rng.randint(1, 9) for _ in range(40)}
+    manager.load_values(values)
+
+    entered = RuleManager(mixed_rules())
+    for pos, value in values.items():
+        entered.update(value, {pos: 0})
+
+    assert values_of(manager) == values_of(entered) == values
+    assert manager.conflicts == entered.conflicts
+    assert manager.violations == entered.violations
+    assert len(manager.unsatisfied) == len(entered.unsatisfied)
+    assert rule_states(manager) == rule_states(entered)
+
+
+def play_randomly(manager: RuleManager, rng: random.Random, moves: int):
+    """Enters, overwrites and erases single values the way the board does, yielding after each one.
+    Most moves land on component rule tiles, so rules keep flipping between satisfied and broken."""
+    rule_tiles = sorted({pos for rule in manager.component_rules for pos in rule.bound_to})
+    for _ in range(moves):
+        pos = rng.choice(rule_tiles) if rng.random() < 0.8 else (rng.randrange(9), rng.randrange(9))
+        old = manager.value_at(pos)
+        manager.update(rng.choice([old or 1, rng.randint(1, 9)]), {pos: old})
+        yield
+
+
+def key_of(rule) -> tuple:
+    return type(rule).__name__, tuple(sorted(rule.bound_to))
+
+
+def test_unsatisfied_follows_each_update():
+    rng = random.Random(2)
+    manager = RuleManager(mixed_rules())
+    for _ in play_randomly(manager, rng, 150):
+        components = manager.component_rules & manager.active_rules
+        assert manager.unsatisfied == {rule for rule in components if not rule.check()}
+
+        rebuilt = RuleManager(copy.deepcopy(manager.rules))
+        rebuilt.load_values(values_of(manager))
+        assert {key_of(rule) for rule in manager.unsatisfied} == {key_of(rule) for rule in rebuilt.unsatisfied}
+        assert rule_states(manager) == rule_states(rebuilt)
+        assert manager.check() == rebuilt.check()
+
+
+def test_violations_follow_each_update():
+    rng = random.Random(3)
+    manager = RuleManager(mixed_rules())
+    for _ in play_randomly(manager, rng, 150):
+        counts = {}
+        for rule in manager.component_rules & manager.active_rules:
+            for pos in rule.violations:
+                counts[pos] = counts.get(pos, 0) + 1
+        assert manager.violations == counts
+
+        rebuilt = RuleManager(copy.deepcopy(manager.rules))
+        rebuilt.load_values(values_of(manager))
+        assert manager.violations == rebuilt.violations
+        assert manager.conflicting_tiles() == rebuilt.conflicting_tiles()
@@ -0,0 +1,153 @@
+"""Solvers checked against solutions found by brute force or by each other.
+
+Run from the repository root: PYTHONPATH=src python -m pytest src/tests
+"""
+import random
+
+import pygame as pg
+import pytest
+
+pg.init()
+
+from sudoku.level import Level, seeds, parse_seed
+from sudoku.rules import (
+    SudokuRule, DiagonalRule, KillerRule, ThermometerRule, ArrowRule, WhiteDotRule, BlackDotRule, EvenRule, OddRule
+)
+from sudoku.rules.rule import RuleManager, POSITIONS
+from sudoku.solver import (
+    ExactCoverSolver, SolverError, Symmetry, generate_puzzle, PropagationSolver, SolveStatus, count_solutions
+)
+
+
+def as_set(solutions: list[dict[tuple[int, int], int]]) -> set[tuple]:
+    return {tuple(sorted(solution.items())) for solution in solutions}
+
+
+def assert_solves(ruleset: set, start_values: dict[tuple[int, int], int], solution: dict[tuple[int, int], int]):
+    """The solution keeps the clues, fills every tile and breaks no rule."""
+    assert len(solution) == 81
+    assert all(solution[pos] == value for pos, value in start_values.items())
+    manager = RuleManager(ruleset)
+    manager.load_values(solution)
+    assert manager.check()
+
+
+def blanked(solution: dict[tuple[int, int], int], tiles: list[tuple[int, int]]) -> dict[tuple[int, int], int]:
+    return {pos: value for pos, value in solution.items() if pos not in tiles}
+
+
+@pytest.mark.parametrize("seed", seeds[:5])
+def test_exact_cover_solves_seeds(seed):
+    start_values = parse_seed(seed)
+    solutions = ExactCoverSolver.from_ruleset({SudokuRule()}).solve(start_values, limit=2)
+
+    assert len(solutions) == 1
+    assert_solves({SudokuRule()}, start_values, solutions[0])
+
+
+def test_exact_cover_finds_every_solution():
+    # Blanking a rectangle of two swapped digits within a band leaves exactly two fills of it
+    solver = ExactCoverSolver.from_ruleset({SudokuRule()})
+    solution = solver.solve({})[0]
+    tiles = next(
+        [(x1, y1), (x2, y1), (x1, y2), (x2, y2)]
+        for y1 in range(9) for y2 in range(y1 + 1, y1 // 3 * 3 + 3) for x1 in range(9) for x2 in range(x1 + 1, 9)
+        if solution[(x1, y1)] == solution[(x2, y2)] and solution[(x2, y1)] == solution[(x1, y2)]
+    )
+    start_values = blanked(solution, tiles)
+
+    solutions = solver.solve(start_values, limit=10)
+    assert len(as_set(solutions)) == 2
+    for found in solutions:
+        assert_solves({SudokuRule()}, start_values, found)
+
+
+def test_exact_cover_with_diagonals():
+    ruleset = {SudokuRule(), DiagonalRule()}
+    solution = ExactCoverSolver.from_ruleset(ruleset).solve({})[0]
+    assert_solves(ruleset, {}, solution)
+
+
+def test_exact_cover_rejects_clashing_clues():
+    assert ExactCoverSolver.from_ruleset({SudokuRule()}).solve({(0, 0): 1, (8, 0): 1}) == []
+
+
+def test_exact_cover_rejects_component_rules():
+    with pytest.raises(SolverError):
+        ExactCoverSolver.from_ruleset({SudokuRule(), KillerRule(3, {(0, 0), (1, 0)})})
+
+
+@pytest.mark.parametrize("symmetry", list(Symmetry))
+def test_generated_puzzles_are_unique_and_symmetric(symmetry):
+    rng = random.Random(0)
+    for clues in 0, 30:
+        values = generate_puzzle(clues, symmetry, rng)
+
+        assert len(ExactCoverSolver.from_ruleset({SudokuRule()}).solve(values, limit=2)) == 1
+        assert all(other in values for pos in values for other in symmetry.orbit(pos))
+        if clues:
+            assert len(values) <= clues
+
+
+def rules_around(solution: dict[tuple[int, int], int], rng: random.Random) -> set:
+    """Component rules of every kind the solution keeps, placed wherever its digits allow them."""
+    def first(condition, offsets):
+        starts = [pos for pos in POSITIONS if all(pos[0] + dx < 9 and pos[1] + dy < 9 for dx, dy in offsets)]
+        rng.shuffle(starts)
+        for x, y in starts:
+            tiles = [(x + dx, y + dy) for dx, dy in offsets]
+            if condition(*(solution[pos] for pos in tiles)):
+                return tiles
+
+    row, pair = ((0, 0), (1, 0), (2, 0)), ((0, 0), (1, 0))
+    corner, square = ((0, 0), (0, 1), (1, 1)), ((0, 0), (1, 0), (0, 1), (1, 1))
+    cages = first(lambda *_: True, corner), first(lambda *digits: len(set(digits)) == 4, square)
+    return {
+        SudokuRule(),
+        *(KillerRule(sum(solution[pos] for pos in cage), set(cage)) for cage in cages),
+        ThermometerRule(first(lambda a, b, c: a < b < c, row)),
+        ArrowRule(first(lambda a, b, c: a == b + c, row)),
+        WhiteDotRule(*first(lambda a, b: abs(a - b) == 1, pair)),
+        BlackDotRule(*first(lambda a, b: a == 2 * b or b == 2 * a, pair)),
+        EvenRule(first(lambda a: a % 2 == 0, ((0, 0),))[0]),
+        OddRule(first(lambda a: a % 2 == 1, ((0, 0),))[0]),
+    }
+
+
+def reference_solutions(ruleset: set, start_values: dict[tuple[int, int], int]) -> set[tuple]:
+    """Every classic solution, kept when the rule manager finds all the rules satisfied."""
+    found = set()
+    for solution in ExactCoverSolver.from_ruleset({SudokuRule()}).solve(start_values, limit=10_000):
+        manager = RuleManager(ruleset)
+        manager.load_values(solution)
+        if manager.check():
+            found.add(tuple(sorted(solution.items())))
+    return found
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_propagation_matches_reference(seed):
+    rng = random.Random(seed)
+    solution = ExactCoverSolver.from_ruleset({SudokuRule()}).solve(generate_puzzle(0, Symmetry.NONE, rng), 1)[0]
+    ruleset = rules_around(solution, rng)
+    rule_tiles = {pos for rule in ruleset for pos in getattr(rule, "bound_to", ())}
+    blank = rule_tiles | set(rng.sample(POSITIONS, 40))
+    start_values = {pos: value for pos, value in solution.items() if pos not in blank}
+
+    expected = reference_solutions(ruleset, start_values)
+    assert tuple(sorted(solution.items())) in expected
+
+    result = PropagationSolver(ruleset).solve(start_values, limit=10_000)
+    assert result.status is SolveStatus.SOLVED
+    assert as_set(result.solutions) == expected
+
+    count = count_solutions(Level(ruleset=ruleset, start_values=start_values))
+    assert count.count == min(2, len(expected))
+    assert count.is_unique == (len(expected) == 1)
+
+
+def test_propagation_finds_no_solution():
+    cage = KillerRule(3, {(0, 0), (1, 0)})
+    # The cage needs a 1 next to the 2, and the row already has one
+    result = PropagationSolver({SudokuRule(), cage}).solve({(0, 0): 2, (2, 0): 1})
+    assert result.status is SolveStatus.NO_SOLUTION and not result.solutions